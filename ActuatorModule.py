@@ -0,0 +1,499 @@
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+
+class PycawAudio:
+    """Windows master volume through pycaw; COM is initialised on the calling (actuator) thread."""
+
+    def __init__(self):
+        import comtypes
+        from comtypes import CLSCTX_ALL
+        from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+
+        self.comtypes = comtypes
+        comtypes.CoInitialize()
+        devices = AudioUtilities.GetSpeakers()
+        interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+        self.volume = interface.QueryInterface(IAudioEndpointVolume)
+
+    def set(self, percent):
+        self.volume.SetMasterVolumeLevelScalar(percent / 100, None)
+
+    def get(self):
+        return int(self.volume.GetMasterVolumeLevelScalar() * 100)
+
+    def close(self):
+        self.volume = None
+        self.comtypes.CoUninitialize()
+
+
+class CommandAudio:
+    """Linux volume through pactl (PulseAudio/PipeWire), or amixer when pactl is missing."""
+
+    def __init__(self):
+        if shutil.which("pactl"):
+            self.set_command = ["pactl", "set-sink-volume", "@DEFAULT_SINK@", "{}%"]
+            self.get_command = ["pactl", "get-sink-volume", "@DEFAULT_SINK@"]
+        elif shutil.which("amixer"):
+            self.set_command = ["amixer", "-q", "sset", "Master", "{}%"]
+            self.get_command = ["amixer", "sget", "Master"]
+        else:
+            raise RuntimeError("neither pactl nor amixer found")
+
+    def set(self, percent):
+        subprocess.run([part.format(int(percent)) for part in self.set_command], check=True)
+
+    def get(self):
+        output = subprocess.run(self.get_command, check=True, capture_output=True, text=True).stdout
+        return int(re.search(r"(\d+)%", output).group(1))
+
+    def close(self):
+        pass
+
+
+class OsascriptAudio:
+    """macOS output volume through osascript."""
+
+    def set(self, percent):
+        subprocess.run(["osascript", "-e", "set volume output volume {}".format(int(percent))], check=True)
+
+    def get(self):
+        output = subprocess.run(["osascript", "-e", "output volume of (get volume settings)"],
+                                check=True, capture_output=True, text=True).stdout
+        return int(output)
+
+    def close(self):
+        pass
+
+
+class SbcDisplay:
+    """Screen brightness through screen_brightness_control (Windows and Linux)."""
+
+    def __init__(self):
+        import screen_brightness_control as sbc
+
+        self.sbc = sbc
+
+    def set(self, percent):
+        self.sbc.set_brightness(percent)
+
+    def get(self):
+        brightness = self.sbc.get_brightness()
+        # one value per display
+        return brightness[0] if isinstance(brightness, list) else brightness
+
+    def close(self):
+        pass
+
+
+class PyautoguiPointer:
+    def __init__(self):
+        import pyautogui
+
+        pyautogui.FAILSAFE = False
+        self.pyautogui = pyautogui
+
+    def move_rel(self, dx, dy):
+        self.pyautogui.moveRel(dx, dy, 0)
+
+    def move_to(self, x, y):
+        # no PAUSE sleep after the call, the cursor thread moves the pointer at display rate
+        self.pyautogui.moveTo(x, y, 0, _pause=False)
+
+    def screen_size(self):
+        return tuple(self.pyautogui.size())
+
+    def click(self, button):
+        self.pyautogui.click(x=None, y=None, button=button, clicks=1, interval=0.3)
+
+    def double_click(self):
+        self.pyautogui.doubleClick(x=None, y=None, interval=0)
+
+    def mouse_down(self, button):
+        self.pyautogui.mouseDown(button=button, _pause=False)
+
+    def mouse_up(self, button):
+        self.pyautogui.mouseUp(button=button, _pause=False)
+
+    def scroll(self, clicks):
+        self.pyautogui.scroll(clicks)
+
+    def close(self):
+        pass
+
+
+class KeyboardKeys:
+    """Windows keys through the keyboard package (it needs root on Linux)."""
+
+    def __init__(self):
+        import keyboard
+
+        self.keyboard = keyboard
+
+    def send(self, key):
+        self.keyboard.send(key)
+
+    def press(self, key):
+        self.keyboard.press(key)
+
+    def release(self, key):
+        self.keyboard.release(key)
+
+    def close(self):
+        pass
+
+
+class PyautoguiKeys:
+    def __init__(self):
+        import pyautogui
+
+        self.pyautogui = pyautogui
+
+    def send(self, key):
+        self.pyautogui.press(key)
+
+    def press(self, key):
+        self.pyautogui.keyDown(key)
+
+    def release(self, key):
+        self.pyautogui.keyUp(key)
+
+    def close(self):
+        pass
+
+
+# device classes of SystemBackend per platform, by sys.platform prefix
+PLATFORM_DEVICES = {
+    "win": {"audio": PycawAudio, "display": SbcDisplay, "pointer": PyautoguiPointer, "keys": KeyboardKeys},
+    "linux": {"audio": CommandAudio, "display": SbcDisplay, "pointer": PyautoguiPointer, "keys": PyautoguiKeys},
+    "darwin": {"audio": OsascriptAudio, "pointer": PyautoguiPointer, "keys": PyautoguiKeys},
+}
+
+
+class SystemBackend:
+    """
+    The desktop of this machine. Each device (audio, display, pointer, keys)
+    is loaded on its first use, on the actuator thread, so creating the
+    backend imports nothing and a session that only changes the volume never
+    loads pyautogui or keyboard.
+    """
+
+    def __init__(self, platform=None):
+        platform = platform or sys.platform
+        self.device_classes = next((devices for prefix, devices in PLATFORM_DEVICES.items()
+                                    if platform.startswith(prefix)), {})
+        self.platform = platform
+        self.devices = {}
+
+    def device(self, name):
+        device = self.devices.get(name)
+        if device is None:
+            if name not in self.device_classes:
+                raise RuntimeError(name + " control is not supported on " + self.platform)
+            device = self.devices[name] = self.device_classes[name]()
+        return device
+
+    def open(self):
+        pass
+
+    def close(self):
+        devices, self.devices = self.devices, {}
+        for device in devices.values():
+            device.close()
+
+    def set_volume(self, percent):
+        self.device("audio").set(percent)
+
+    def get_volume(self):
+        return self.device("audio").get()
+
+    def set_brightness(self, percent):
+        self.device("display").set(percent)
+
+    def get_brightness(self):
+        return self.device("display").get()
+
+    def move_rel(self, dx, dy):
+        self.device("pointer").move_rel(dx, dy)
+
+    def move_to(self, x, y):
+        self.device("pointer").move_to(x, y)
+
+    def screen_size(self):
+        return self.device("pointer").screen_size()
+
+    def click(self, button):
+        self.device("pointer").click(button)
+
+    def double_click(self):
+        self.device("pointer").double_click()
+
+    def mouse_down(self, button):
+        self.device("pointer").mouse_down(button)
+
+    def mouse_up(self, button):
+        self.device("pointer").mouse_up(button)
+
+    def scroll(self, clicks):
+        self.device("pointer").scroll(clicks)
+
+    def key_send(self, key):
+        self.device("keys").send(key)
+
+    def key_press(self, key):
+        self.device("keys").press(key)
+
+    def key_release(self, key):
+        self.device("keys").release(key)
+
+
+class RecordingBackend:
+    """Keeps every call in `calls` instead of touching the system, for benchmarks and tests."""
+
+    def __init__(self, screen=(1920, 1080)):
+        self.calls = []
+        self.levels = {"volume": 0, "brightness": 0}
+        self.screen = screen
+
+    def record(self, action, *args):
+        self.calls.append((action, args))
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def set_volume(self, percent):
+        self.record("set_volume", percent)
+        self.levels["volume"] = percent
+
+    def get_volume(self):
+        return self.levels["volume"]
+
+    def set_brightness(self, percent):
+        self.record("set_brightness", percent)
+        self.levels["brightness"] = percent
+
+    def get_brightness(self):
+        return self.levels["brightness"]
+
+    def move_rel(self, dx, dy):
+        self.record("move_rel", dx, dy)
+
+    def move_to(self, x, y):
+        self.record("move_to", x, y)
+
+    def screen_size(self):
+        return self.screen
+
+    def click(self, button):
+        self.record("click", button)
+
+    def double_click(self):
+        self.record("double_click")
+
+    def mouse_down(self, button):
+        self.record("mouse_down", button)
+
+    def mouse_up(self, button):
+        self.record("mouse_up", button)
+
+    def scroll(self, clicks):
+        self.record("scroll", clicks)
+
+    def key_send(self, key):
+        self.record("key_send", key)
+
+    def key_press(self, key):
+        self.record("key_press", key)
+
+    def key_release(self, key):
+        self.record("key_release", key)
+
+
+class NullBackend(RecordingBackend):
+    """Accepts every action and does nothing, e.g. for a detector that only labels frames."""
+
+    def record(self, action, *args):
+        pass
+
+
+class SimulatedBackend(RecordingBackend):
+    """
+    Local stand-in desktop for tests and demos: besides recording every call
+    it keeps a pointer clamped to a virtual screen, the keys and mouse
+    buttons held down and the keys typed. Every pointer position is logged with its perf_counter
+    time in `pointer_log`, for measuring cursor latency and jitter.
+    """
+
+    def __init__(self, screen=(1920, 1080)):
+        super().__init__(screen)
+        self.position = [screen[0] // 2, screen[1] // 2]
+        self.pointer_log = []
+        self.held = set()
+        self.buttons = set()
+        self.typed = []
+
+    def set_volume(self, percent):
+        super().set_volume(max(0, min(100, percent)))
+
+    def set_brightness(self, percent):
+        super().set_brightness(max(0, min(100, percent)))
+
+    def move_rel(self, dx, dy):
+        super().move_rel(dx, dy)
+        self._move(self.position[0] + dx, self.position[1] + dy)
+
+    def move_to(self, x, y):
+        super().move_to(x, y)
+        self._move(x, y)
+
+    def _move(self, x, y):
+        self.position = [max(0, min(self.screen[0] - 1, x)), max(0, min(self.screen[1] - 1, y))]
+        self.pointer_log.append((time.perf_counter(), self.position[0], self.position[1]))
+
+    def mouse_down(self, button):
+        super().mouse_down(button)
+        self.buttons.add(button)
+
+    def mouse_up(self, button):
+        super().mouse_up(button)
+        self.buttons.discard(button)
+
+    def key_send(self, key):
+        super().key_send(key)
+        self.typed.append(key)
+
+    def key_press(self, key):
+        super().key_press(key)
+        self.held.add(key)
+
+    def key_release(self, key):
+        super().key_release(key)
+        self.held.discard(key)
+
+
+BACKENDS = {"system": SystemBackend, "null": NullBackend, "recording": RecordingBackend,
+            "simulated": SimulatedBackend}
+
+
+def make_backend(name=None):
+    """Backend by name, or from the GESTURESYNC_BACKEND environment variable, "system" by default."""
+    name = name or os.environ.get("GESTURESYNC_BACKEND") or "system"
+    if name not in BACKENDS:
+        raise ValueError("unknown actuator backend {!r}, expected one of {}".format(name, ", ".join(BACKENDS)))
+    return BACKENDS[name]()
+
+
+class Actuator:
+    """
+    Runs the OS side effects of the gestures on a background worker.
+
+    Levels (volume, brightness) are coalesced: only the newest target is
+    kept, and a target equal to the value already applied is dropped, so a
+    steady hand does not hit the system APIs every frame. Other actions
+    (clicks, keys, pointer moves) keep their order; consecutive pointer
+    moves are merged into one. The backend's device handles are opened on
+    the worker thread, and the last value read back after each change is
+    kept in `current` for the overlays.
+
+    :param backend: backend object, or its name in BACKENDS; None picks one with make_backend
+    """
+
+    def __init__(self, backend=None):
+        self.backend = make_backend(backend) if backend is None or isinstance(backend, str) else backend
+        self.condition = threading.Condition()
+        self.levels = {}
+        self.applied = {}
+        self.current = {}
+        self.actions = deque()
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        with self.condition:
+            if self.thread is None:
+                self.running = True
+                self.thread = threading.Thread(target=self._run, name="actuator", daemon=True)
+                self.thread.start()
+        return self
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+
+    def set_level(self, name, value):
+        with self.condition:
+            if self.levels.get(name, self.applied.get(name)) == value:
+                return
+            self.levels[name] = value
+            self.condition.notify()
+        self.start()
+
+    def set_volume(self, percent):
+        self.set_level("volume", percent)
+
+    def set_brightness(self, percent):
+        self.set_level("brightness", percent)
+
+    def send(self, action, *args):
+        with self.condition:
+            if action == "move_rel" and self.actions and self.actions[-1][0] == "move_rel":
+                _, (dx, dy) = self.actions.pop()
+                args = (dx + args[0], dy + args[1])
+            self.actions.append((action, args))
+            self.condition.notify()
+        self.start()
+
+    def _run(self):
+        try:
+            self.backend.open()
+        except Exception as e:
+            print("Error opening actuator backend:", e)
+
+        while True:
+            with self.condition:
+                while self.running and not self.levels and not self.actions:
+                    self.condition.wait()
+                # pending work is still applied after stop()
+                if not self.running and not self.levels and not self.actions:
+                    break
+                levels, self.levels = self.levels, {}
+                actions, self.actions = self.actions, deque()
+
+            for action, args in actions:
+                self._call(action, *args)
+
+            for name, value in levels.items():
+                if self.applied.get(name) == value:
+                    continue
+                if self._call("set_" + name, value):
+                    self.applied[name] = value
+                    try:
+                        self.current[name] = getattr(self.backend, "get_" + name)()
+                    except Exception as e:
+                        print("Error reading " + name + ":", e)
+
+        try:
+            self.backend.close()
+        except Exception as e:
+            print("Error closing actuator backend:", e)
+
+    def _call(self, action, *args):
+        try:
+            getattr(self.backend, action)(*args)
+            return True
+        except Exception as e:
+            print("Error in " + action + ":", e)
+            return False
@@ -0,0 +1,208 @@
+"""
+asyncio interface to HandDetection.
+
+    async for frame in hand_frames(0):
+        print(frame.number, [hand.code for hand in frame.hands], frame.gestures)
+
+Capture, inference and gesture handling run on one worker thread of an
+executor, so the event loop only wakes up for finished frames. Frames are
+StreamModule.StreamFrame tuples, the same as the landmark stream delivers.
+GestureBroadcaster shares one source among any number of consumers.
+"""
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from StreamModule import StreamFrame, StreamHand
+from SessionModule import HANDEDNESS
+
+
+def snapshot(detector, number, timestamp, gestures=()):
+    """StreamFrame of the detector's current landmarks, copied so later frames do not change it."""
+    frame = detector.landmarks
+    labels = detector.handedness_labels()
+    codes = frame.codes()
+    hands = [StreamHand(HANDEDNESS.get(labels[h], -1) if h < len(labels) else -1, int(codes[h]),
+                        frame.data[h].copy()) for h in range(frame.count)]
+    return StreamFrame(number, timestamp, detector.mode, hands, list(gestures))
+
+
+def _new_detector():
+    from ActuatorModule import Actuator
+    from HandDetectionModule import HandDetection
+
+    return HandDetection(actuator=Actuator("null"))
+
+
+async def hand_frames(source=0, detector=None, run_gestures=False, executor=None):
+    """
+    Async generator of StreamFrames from a camera index, video path or open cv2.VideoCapture.
+
+    :param detector: HandDetection to run, left open afterwards; by default one is built with the
+                     null actuator backend and closed when the generator ends
+    :param run_gestures: also run handle_gestures (without drawing) and report the gestures that acted,
+                         which only reach the desktop with a detector given here; otherwise only
+                         landmarks and finger codes are reported, with no gestures
+    :param executor: executor for the blocking work; by default a private single-thread one, as the
+                     MediaPipe graph must not run on two threads at once
+
+    While the consumer handles one frame the next is already being captured
+    and processed. Closing the generator or cancelling the consumer stops
+    it; the capture is released once the step in progress has finished.
+    """
+    cap = source if isinstance(source, cv2.VideoCapture) else cv2.VideoCapture(source)
+    own_detector = detector is None
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hand-frames")
+    number = 0
+
+    def step():
+        nonlocal detector, number
+        if detector is None:
+            # built on the worker thread, with the graph it will run on
+            detector = _new_detector()
+        success, image = cap.read()
+        if not success:
+            return None
+        timestamp = time.time()
+        detector.use_results(image, detector.detect(image), False)
+        if run_gestures:
+            # handle_gestures ticks the debouncer itself
+            detector.handle_gestures(image, image.shape[1], False)
+        else:
+            list_of_lm, _, _ = detector.find_position(image, None, False)
+            if len(list_of_lm):
+                detector.fingers_up()
+        number += 1
+        # the gestures that acted in handle_gestures; none did when it was not run
+        return snapshot(detector, number, timestamp, detector.fired if run_gestures else ())
+
+    def release(_=None):
+        if cap is not source:
+            cap.release()
+        # the actuator and cursor threads of a detector built here end with the generator
+        if own_detector and detector is not None:
+            detector.close()
+        if own_executor:
+            executor.shutdown(wait=False)
+
+    # the concurrent future, not its asyncio wrapper: cancelling the wrapper does not stop the thread
+    pending = executor.submit(step)
+    try:
+        while True:
+            frame = await asyncio.wrap_future(pending)
+            if frame is None:
+                break
+            pending = executor.submit(step)
+            yield frame
+    finally:
+        # a running step cannot be interrupted; clean up once it has returned
+        pending.add_done_callback(release)
+
+
+class Subscription:
+    """One consumer's view of a GestureBroadcaster: an async iterator over a bounded, drop-oldest queue."""
+
+    def __init__(self, broadcaster, maxsize):
+        self.broadcaster = broadcaster
+        self.queue = deque(maxlen=maxsize)
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, frame):
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append(frame)
+        self.ready.set()
+
+    def close(self):
+        self.closed = True
+        self.ready.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self.queue:
+            if self.closed:
+                if self.broadcaster.error is not None:
+                    raise self.broadcaster.error
+                raise StopAsyncIteration
+            self.ready.clear()
+            await self.ready.wait()
+        return self.queue.popleft()
+
+    def unsubscribe(self):
+        self.broadcaster.subscriptions.discard(self)
+        self.close()
+
+
+class GestureBroadcaster:
+    """
+    Runs one hand_frames source and hands every frame to all subscribers.
+
+        async with GestureBroadcaster(0) as broadcaster:
+            async for frame in broadcaster.subscribe():
+                ...
+
+    Each subscriber has its own queue of at most `maxsize` frames; when a
+    consumer falls behind its oldest frames are dropped (counted in its
+    `dropped`), so a slow consumer never holds back the others or the source.
+    """
+
+    def __init__(self, source=0, detector=None, maxsize=8, run_gestures=False, executor=None):
+        self.source = source
+        self.detector = detector
+        self.maxsize = maxsize
+        self.run_gestures = run_gestures
+        self.executor = executor
+        self.subscriptions = set()
+        self.task = None
+        self.error = None
+        self.frames = 0
+
+    def subscribe(self, maxsize=None):
+        subscription = Subscription(self, maxsize or self.maxsize)
+        if self.task is not None and self.task.done():
+            subscription.close()
+        else:
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def _run(self):
+        frames = hand_frames(self.source, self.detector, self.run_gestures, self.executor)
+        try:
+            async for frame in frames:
+                self.frames += 1
+                for subscription in self.subscriptions:
+                    subscription.put(frame)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            await frames.aclose()
+            for subscription in self.subscriptions:
+                subscription.close()
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+
+    async def __aenter__(self):
+        return self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+        return False
@@ -0,0 +1,94 @@
+import time
+
+import numpy as np
+
+# (model_complexity, max_side, max_hands) from cheapest to richest; max_side 0 is the full frame
+DEFAULT_LADDER = [
+    (0, 320, 1),
+    (0, 480, 1),
+    (0, 640, 1),
+    (1, 640, 1),
+    (1, 960, 1),
+    (1, 0, 1),
+    (1, 0, 2),
+]
+
+
+class BudgetController:
+    """
+    Keeps inference within a per-frame time budget by stepping the detector
+    along a ladder of settings (model complexity, inference resolution,
+    max hands).
+
+    Every inference time is passed to observe(). Once `window` samples have
+    been collected at a level, the median decides: above the budget steps
+    down at once, below `headroom` times the budget steps up. A level that
+    had to be left for being too slow is not tried again for `backoff`
+    seconds, doubled each time it fails, so a machine right at the edge
+    settles instead of oscillating. The first `warmup` frames after a change
+    are ignored, since a rebuilt graph is slow on its first frames.
+    """
+
+    def __init__(self, detector, budget, ladder=None, level=None, window=30, headroom=0.6,
+                 warmup=5, backoff=5.0, max_backoff=300.0):
+        self.detector = detector
+        self.budget = budget
+        # the hands the detector was created with are the most the ladder asks for
+        ladder = [(c, s, min(h, detector.max_hands)) for c, s, h in (ladder or DEFAULT_LADDER)]
+        self.ladder = list(dict.fromkeys(ladder))
+        self.window = window
+        self.headroom = headroom
+        self.warmup = warmup
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.samples = np.zeros(window, np.float64)
+        self.count = 0
+        self.skip = warmup
+        self.blocked_until = [0.0] * len(self.ladder)
+        self.penalty = [backoff] * len(self.ladder)
+        self.changes = 0
+        # start from the detector's own settings when they are on the ladder, else in the middle
+        current = (detector.model_complexity, detector.max_side, detector.max_hands)
+        if level is None:
+            level = self.ladder.index(current) if current in self.ladder else len(self.ladder) // 2
+        self.level = level
+        self.apply()
+
+    def apply(self):
+        complexity, max_side, max_hands = self.ladder[self.level]
+        self.detector.configure(model_complexity=complexity, max_side=max_side, max_hands=max_hands)
+        self.count = 0
+        self.skip = self.warmup
+
+    def observe(self, duration, now=None):
+        """Inference time of one frame in seconds; returns True when the settings changed."""
+        if self.skip:
+            self.skip -= 1
+            return False
+        self.samples[self.count] = duration
+        self.count += 1
+        if self.count < self.window:
+            return False
+
+        now = time.monotonic() if now is None else now
+        median = float(np.median(self.samples))
+        self.count = 0
+        if median > self.budget and self.level > 0:
+            # too slow here: back off from this level for a while, longer each time
+            self.blocked_until[self.level] = now + self.penalty[self.level]
+            self.penalty[self.level] = min(self.penalty[self.level] * 2, self.max_backoff)
+            self.level -= 1
+        elif (median < self.budget * self.headroom and self.level + 1 < len(self.ladder)
+              and now >= self.blocked_until[self.level + 1]):
+            self.level += 1
+        else:
+            return False
+        self.changes += 1
+        self.apply()
+        return True
+
+    def state(self):
+        complexity, max_side, max_hands = self.ladder[self.level]
+        return {"level": self.level, "model_complexity": complexity, "max_side": max_side,
+                "max_hands": max_hands, "changes": self.changes}
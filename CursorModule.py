@@ -0,0 +1,173 @@
+import math
+import threading
+import time
+
+
+class OneEuroFilter:
+    """
+    One Euro filter (Casiez et al., CHI 2012) for a 2D point.
+
+    A low-pass filter whose cutoff rises with speed: a still hand is smoothed
+    hard, which removes jitter, and a fast one is followed closely, which
+    keeps the lag low. min_cutoff (Hz) sets the smoothing at rest and beta
+    how quickly it relaxes as the point speeds up.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.01, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.velocity = (0.0, 0.0)
+        self.time = None
+
+    @staticmethod
+    def alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, x, y, t):
+        if self.value is None or t <= self.time:
+            self.value, self.time = (x, y), t
+            return self.value
+        dt = t - self.time
+        px, py = self.value
+        a = self.alpha(self.d_cutoff, dt)
+        vx = self.velocity[0] + a * ((x - px) / dt - self.velocity[0])
+        vy = self.velocity[1] + a * ((y - py) / dt - self.velocity[1])
+        a = self.alpha(self.min_cutoff + self.beta * math.hypot(vx, vy), dt)
+        self.value = (px + a * (x - px), py + a * (y - py))
+        self.velocity = (vx, vy)
+        self.time = t
+        return self.value
+
+
+class CursorEngine:
+    """
+    Absolute pointer control from a fingertip.
+
+    update() maps a normalized camera position inside `region` (x0, y0, x1,
+    y1, fractions of the frame) to screen pixels, mirrored so the pointer
+    follows the hand, and filters it with a OneEuroFilter. A worker thread
+    then walks the pointer from where it is to the new target over one
+    camera frame interval, moving it `refresh_rate` times per second, so the
+    pointer glides between frames instead of jumping once per frame. The
+    worker sleeps while the pointer is at rest.
+
+    The pointer is any object with move_to(x, y) and screen_size(). The time
+    from an update to the first pointer move that reflects it is recorded in
+    `metrics` as "cursor_latency".
+    """
+
+    def __init__(self, pointer, region=(0.15, 0.15, 0.85, 0.85), mirror=True, refresh_rate=60,
+                 min_cutoff=1.0, beta=0.01, idle_reset=0.3, metrics=None):
+        self.pointer = pointer
+        self.region = region
+        self.mirror = mirror
+        self.refresh_rate = refresh_rate
+        self.filter = OneEuroFilter(min_cutoff, beta)
+        # after this long without updates the hand is treated as new and the pointer jumps to it
+        self.idle_reset = idle_reset
+        self.metrics = metrics
+        self.screen = None
+
+        self.condition = threading.Condition()
+        self.position = None
+        self.start_position = self.target = (0.0, 0.0)
+        self.segment_start = 0.0
+        self.interval = 1 / 30
+        self.last_update = None
+        self.sample_time = None
+        self.moving = False
+        self.running = False
+        self.thread = None
+
+    def to_screen(self, x, y):
+        if self.screen is None:
+            self.screen = self.pointer.screen_size()
+        x0, y0, x1, y1 = self.region
+        u = min(max((x - x0) / (x1 - x0), 0.0), 1.0)
+        v = min(max((y - y0) / (y1 - y0), 0.0), 1.0)
+        if self.mirror:
+            u = 1.0 - u
+        return u * (self.screen[0] - 1), v * (self.screen[1] - 1)
+
+    def update(self, x, y, t=None):
+        """New fingertip position, normalized to the camera frame, seen at perf_counter time t."""
+        t = time.perf_counter() if t is None else t
+        sx, sy = self.to_screen(x, y)
+        with self.condition:
+            if self.last_update is None or t - self.last_update > self.idle_reset:
+                self.filter.reset()
+            else:
+                # glide over the typical frame interval, bounded to sane camera rates
+                self.interval += 0.2 * (min(max(t - self.last_update, 1 / 240), 0.1) - self.interval)
+            self.last_update = t
+            target = self.filter(sx, sy, t)
+            now = time.perf_counter()
+            self.start_position = self._position(now) if self.position is not None else target
+            self.target = target
+            self.segment_start = now
+            self.sample_time = t
+            self.moving = True
+            self.condition.notify()
+        self.start()
+
+    def _position(self, now):
+        progress = min((now - self.segment_start) / self.interval, 1.0)
+        (x0, y0), (x1, y1) = self.start_position, self.target
+        return x0 + (x1 - x0) * progress, y0 + (y1 - y0) * progress
+
+    def start(self):
+        with self.condition:
+            if self.thread is None:
+                self.running = True
+                self.thread = threading.Thread(target=self._run, name="cursor", daemon=True)
+                self.thread.start()
+        return self
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+
+    def _run(self):
+        period = 1 / self.refresh_rate
+        pixel = None
+        next_tick = time.perf_counter()
+        while True:
+            with self.condition:
+                while self.running and not self.moving:
+                    self.condition.wait()
+                    next_tick = time.perf_counter()
+                if not self.running:
+                    break
+                now = time.perf_counter()
+                self.position = self._position(now)
+                if now - self.segment_start >= self.interval:
+                    self.moving = False
+                sample_time, self.sample_time = self.sample_time, None
+
+            new_pixel = (round(self.position[0]), round(self.position[1]))
+            if new_pixel != pixel:
+                try:
+                    self.pointer.move_to(*new_pixel)
+                    pixel = new_pixel
+                except Exception as e:
+                    print("Error in move_to:", e)
+            if sample_time is not None and self.metrics is not None:
+                self.metrics.record("cursor_latency", time.perf_counter() - sample_time)
+
+            next_tick += period
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # fell behind, do not try to catch up with a burst of moves
+                next_tick = time.perf_counter()
@@ -0,0 +1,68 @@
+import time
+
+
+class GestureRule:
+    def __init__(self, cooldown=0.3, repeat_delay=None, repeat_interval=None):
+        """
+        :param cooldown: minimum time between two firings of the gesture
+        :param repeat_delay: hold time before the gesture starts repeating, None for no repeat
+        :param repeat_interval: time between repeats while the gesture is held
+        """
+        self.cooldown = cooldown
+        self.repeat_delay = repeat_delay
+        self.repeat_interval = repeat_interval if repeat_interval is not None else cooldown
+
+
+class GestureDebouncer:
+    """
+    Time-based debouncing for gestures, used instead of time.sleep in the handlers.
+
+    Call tick() once per frame, then fire(name) for every gesture that is
+    present in that frame. fire() returns True only when the action should
+    run: on the rising edge (gesture absent in the previous frame) once the
+    cooldown has passed, and again every repeat_interval while the gesture is
+    held past repeat_delay. The frame loop itself never blocks.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.rules = {}
+        self.default_rule = GestureRule()
+        # name -> [last frame seen, press start, last fire]
+        self.state = {}
+        self.frame = 0
+        self.now = clock()
+
+    def configure(self, name, cooldown=0.3, repeat_delay=None, repeat_interval=None):
+        self.rules[name] = GestureRule(cooldown, repeat_delay, repeat_interval)
+
+    def tick(self, now=None):
+        self.frame += 1
+        self.now = self.clock() if now is None else now
+
+    def fire(self, name, rule=None):
+        rule = rule or self.rules.get(name) or self.default_rule
+        now = self.now
+        state = self.state.get(name)
+
+        if state is None:
+            state = self.state[name] = [self.frame, now, float("-inf")]
+            rising = True
+        else:
+            rising = state[0] < self.frame - 1
+            state[0] = self.frame
+            if rising:
+                state[1] = now
+
+        last_fire = state[2]
+        if rising:
+            fired = now - last_fire >= rule.cooldown
+        elif rule.repeat_delay is not None:
+            fired = (now - state[1] >= rule.repeat_delay
+                     and now - last_fire >= max(rule.repeat_interval, rule.cooldown))
+        else:
+            fired = False
+
+        if fired:
+            state[2] = now
+        return fired
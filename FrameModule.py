@@ -0,0 +1,93 @@
+import threading
+
+import numpy as np
+
+
+class FramePool:
+    """
+    Preallocated image buffers handed out in rotation, so steady-state frames
+    reuse the same memory instead of allocating a new array each time:
+
+        rgb = pool.get(image.shape)
+        cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=rgb)
+
+    The pool holds `depth` flat buffers, each grown to the largest request it
+    has served, and get() returns a view of the next one shaped as asked. A
+    caller whose shapes change every frame, like ROI crops, therefore keeps
+    at most depth x the largest frame. A buffer comes around again after
+    `depth` more requests, so depth must be larger than the number of
+    results the caller keeps alive at once.
+    """
+
+    def __init__(self, depth=2):
+        self.depth = depth
+        self.buffers = [np.empty(0, np.uint8) for _ in range(depth)]
+        self.index = 0
+        self.lock = threading.Lock()
+        self.allocated = 0
+
+    def get(self, shape, dtype=np.uint8):
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape)) * dtype.itemsize
+        with self.lock:
+            index = self.index
+            self.index = (index + 1) % self.depth
+            buffer = self.buffers[index]
+            if buffer.size < size:
+                buffer = self.buffers[index] = np.empty(size, np.uint8)
+                self.allocated += 1
+        return buffer[:size].view(dtype).reshape(shape)
+
+    def clear(self):
+        with self.lock:
+            self.buffers = [np.empty(0, np.uint8) for _ in range(self.depth)]
+
+
+class LeasedFrames:
+    """
+    Buffers lent out until they are given back:
+
+        frame = leases.acquire(shape)
+        ...                               # any number of stages later
+        leases.release(frame)
+
+    acquire() hands out a free buffer of the shape, or allocates one when
+    all are in use, so a buffer is never reused while someone still holds
+    it and the count settles at the most frames in flight at once. Arrays
+    the pool did not allocate are ignored by release().
+    """
+
+    def __init__(self):
+        self.free = {}
+        # id -> array of every buffer handed out, which also keeps the ids valid
+        self.owned = {}
+        self.lock = threading.Lock()
+        self.allocated = 0
+
+    def acquire(self, shape, dtype=np.uint8):
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self.lock:
+            free = self.free.get(key)
+            if free:
+                return free.pop()
+            buffer = np.empty(shape, dtype)
+            self.owned[id(buffer)] = buffer
+            self.allocated += 1
+            return buffer
+
+    def release(self, frame):
+        if frame is None:
+            return
+        with self.lock:
+            if self.owned.get(id(frame)) is not frame:
+                return
+            free = self.free.setdefault((frame.shape, frame.dtype.str), [])
+            if not any(buffer is frame for buffer in free):
+                free.append(frame)
+
+
+def read_only(array):
+    """View of array that cannot be written through, for handing frames to code that must not modify them."""
+    view = array.view()
+    view.flags.writeable = False
+    return view
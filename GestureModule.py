@@ -0,0 +1,72 @@
+from LandmarkModule import FINGER_BITS
+
+# bit of each finger in a finger code, in the order fingers_up returns them
+THUMB, INDEX, MIDDLE, RING, PINKY = FINGER_BITS.tolist()
+# extra code for frames without a hand
+NO_HAND = 32
+NUM_CODES = 33
+
+
+def pattern_codes(pattern):
+    """
+    Codes matched by a finger pattern.
+    :param pattern: five characters thumb to pinky, "1" up, "0" down, "x" either,
+                    e.g. "01100"; "none" for no hand, "*" for every code including no hand
+    """
+    if pattern == "none":
+        return [NO_HAND]
+    if pattern == "*":
+        return list(range(NUM_CODES))
+    if len(pattern) != 5 or set(pattern) - set("01x"):
+        raise ValueError("finger pattern must be 5 characters of 0, 1 or x: " + repr(pattern))
+    codes = [0]
+    for bit, state in zip(FINGER_BITS.tolist(), pattern):
+        if state == "1":
+            codes = [code | bit for code in codes]
+        elif state == "x":
+            codes = codes + [code | bit for code in codes]
+    return sorted(codes)
+
+
+class GestureDispatcher:
+    """
+    Per-mode lookup tables from finger code to the gestures bound to it.
+
+        dispatcher.bind(2, "11000", "zoom", zoom_handler)
+
+    A handler is called as handler(detector, image, draw) and returns the
+    image (or None to leave it unchanged). Binding expands the pattern into
+    the table once, so a frame costs one list index however many gestures
+    are registered.
+    """
+
+    def __init__(self, modes=4):
+        self.tables = [[() for _ in range(NUM_CODES)] for _ in range(modes)]
+
+    def bind(self, mode, pattern, name, handler):
+        while mode >= len(self.tables):
+            self.tables.append([() for _ in range(NUM_CODES)])
+        table = self.tables[mode]
+        for code in pattern_codes(pattern):
+            table[code] = table[code] + ((name, handler),)
+
+    def unbind(self, mode, name):
+        table = self.tables[mode]
+        for code in range(NUM_CODES):
+            table[code] = tuple(entry for entry in table[code] if entry[0] != name)
+
+    def lookup(self, mode, code):
+        if mode >= len(self.tables):
+            return ()
+        return self.tables[mode][code]
+
+    def dispatch(self, detector, mode, code, image, draw=True, names=None):
+        """Run the gestures bound to code in mode, only those in `names` if given."""
+        for name, handler in self.lookup(mode, code):
+            if names is not None and name not in names:
+                continue
+            with detector.metrics.time(name):
+                result = handler(detector, image, draw)
+            if result is not None:
+                image = result
+        return image
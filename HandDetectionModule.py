@@ -3,15 +3,28 @@ import time
 import cv2
 import mediapipe as mp
 import numpy as np
-# for volume control
-from comtypes import CLSCTX_ALL
-from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
-# for brightness control
-import screen_brightness_control as sbc
 
-import pyautogui
+from ActuatorModule import Actuator
+from BudgetModule import BudgetController
+from CursorModule import CursorEngine
+from DebounceModule import GestureDebouncer, GestureRule
+from FrameModule import FramePool, read_only
+from GestureModule import GestureDispatcher, INDEX, MIDDLE, NO_HAND, PINKY, RING
+from IdleModule import IdleGate
+from LandmarkModule import LandmarkFrame
+from MetricsModule import Metrics
+from SessionModule import SessionRecorder
+from StreamModule import DEFAULT_PORT, LandmarkPublisher
+from TemporalModule import TemporalGestures
+from TrackingModule import HandResults, HandTracker, LandmarkPredictor
 
-import keyboard
+
+# modes cycled by the mode button
+VOLUME_MODE, BRIGHTNESS_MODE, MOUSE_MODE, KEYBOARD_MODE = 0, 1, 2, 3
+
+# hand_roles for an unmirrored webcam image, in which MediaPipe labels the user's left hand "Right":
+# the left hand picks the mode, the right hand drives it
+TWO_HAND_ROLES = {"Right": "mode", "Left": "control"}
 
 
 class Button:
@@ -21,11 +34,79 @@ class Button:
         self.text = text
 
 
+class KeyboardLayout:
+    """
+    On-screen keyboard for one caps state and frame size.
+    The keys are drawn once into `overlay`, which is blended onto each frame
+    over the region it covers, and the key under a point is found through a
+    grid of the 100 px cells the keys are laid out on.
+    """
+    origin = 50
+    cell = 100
+
+    def __init__(self, buttons, draw_all, width, height):
+        self.buttons = buttons
+        self.draw_all = draw_all
+        self.width, self.height = width, height
+        # rendered on the first draw(), so headless runs never allocate it
+        self.overlay = None
+        self.transparency = None
+        self.roi = None
+
+        # cell -> buttons touching it; wide keys span more than one cell
+        self.grid = {}
+        for button in buttons:
+            x, y = button.pos
+            w, h = button.size
+            for row in range((y - self.origin) // self.cell, (y + h - self.origin) // self.cell + 1):
+                for col in range((x - self.origin) // self.cell, (x + w - self.origin) // self.cell + 1):
+                    self.grid.setdefault((row, col), []).append(button)
+
+    def render(self):
+        # render every key once on black and on white; the difference is how much of the
+        # frame shows through each pixel, so anti-aliased edges blend instead of being pasted
+        on_black = self.draw_all(np.zeros((self.height, self.width, 3), np.uint8), self.buttons)
+        on_white = self.draw_all(np.full((self.height, self.width, 3), 255, np.uint8), self.buttons)
+        transparency = cv2.subtract(on_white, on_black)
+        rows, cols = np.nonzero(transparency.min(axis=2) < 255)
+        if len(rows):
+            self.roi = (rows.min(), rows.max() + 1, cols.min(), cols.max() + 1)
+        else:
+            self.roi = (0, 0, 0, 0)
+        y0, y1, x0, x1 = self.roi
+        self.overlay = on_black[y0:y1, x0:x1].copy()
+        self.transparency = transparency[y0:y1, x0:x1].copy()
+
+    def draw(self, image):
+        if self.overlay is None:
+            self.render()
+        y0, y1, x0, x1 = self.roi
+        roi = image[y0:y1, x0:x1]
+        # frame * transparency + keys, in place on the keyboard region
+        cv2.multiply(roi, self.transparency, dst=roi, scale=1 / 255)
+        cv2.add(roi, self.overlay, dst=roi)
+        return image
+
+    def hit(self, px, py):
+        # key under the point, or None
+        cell = ((py - self.origin) // self.cell, (px - self.origin) // self.cell)
+        for button in self.grid.get(cell, ()):
+            x, y = button.pos
+            w, h = button.size
+            if x < px < x + w and y < py < y + h:
+                return button
+        return None
+
+
 class HandDetection:
     def __init__(self, mode=False, max_hands=1, model_complexity=1,
-                 detection_confidence=0.7, tracking_confidence=0.5):
-        self.previous_time = 0
-        self.current_time = None
+                 detection_confidence=0.7, tracking_confidence=0.5, actuator=None,
+                 roi_tracking=False, roi_size=256, roi_margin=0.5,
+                 inference_stride=1, inference_budget=None, resync_error=0.03, metrics=None,
+                 cursor_region=(0.15, 0.15, 0.85, 0.85), cursor_rate=60, max_side=0, frame_budget=None,
+                 temporal_gestures=False, hand_roles=None, idle_after=None, idle_heartbeat=1.0):
+        # per-stage latency percentiles and the EMA frame rate shown by show_fps
+        self.metrics = metrics if metrics is not None else Metrics()
         self.list_of_lm = None
         self.results = None
         self.tipIds = [4, 8, 12, 16, 20]
@@ -34,6 +115,8 @@ class HandDetection:
         self.model_complexity = model_complexity
         self.detection_confidence = detection_confidence
         self.tracking_confidence = tracking_confidence
+        # longest side of full frames sent to the model, 0 for the capture size
+        self.max_side = max_side
 
         self.mp_hands = mp.solutions.hands
         self.hands = self.mp_hands.Hands(self.mode, self.max_hands,
@@ -42,7 +125,24 @@ class HandDetection:
         self.mp_drawing = mp.solutions.drawing_utils
         self.bbox = []
         self.fingers = None
-        self.plocX, self.plocY = 0, 0
+        # landmarks of all detected hands as numpy arrays, refreshed by find_position
+        self.landmarks = LandmarkFrame(max_hands)
+        # resize and RGB destinations of process(); two buffers in turn, so the resized
+        # crop and its RGB conversion never share one. MediaPipe copies its input.
+        self.buffers = FramePool(depth=2)
+        self.hand_no = 0
+        # fingers packed into one 5-bit code by fingers_up, NO_HAND when there is no hand
+        self.finger_code = NO_HAND
+
+        # with more than one hand, stable track ids decide which hand handle_gestures follows.
+        # hand_roles maps MediaPipe's handedness label to a role: "control" drives the gestures
+        # of the current mode, "mode" picks the mode by the fingers it holds up (1 to 4),
+        # see TWO_HAND_ROLES
+        self.tracker = HandTracker() if max_hands > 1 else None
+        self.hand_roles = hand_roles or {}
+        self.role_hands = {}
+        self.mode_candidate = None
+        self.mode_since = 0.0
 
         self.caps = 1
         self.keys = [
@@ -64,17 +164,254 @@ class HandDetection:
             ]
         ]
 
+        # KeyboardLayout per (caps, width, height), built on first use
+        self.keyboard_layouts = {}
+
         self.mode = 0
 
-        self.previous_position_x = 1200//2
-        self.previous_position_y = 720//2
+        # cooldowns replace the time.sleep calls that used to stall the frame loop
+        self.debounce = GestureDebouncer()
+        self.debounce.configure("left click", cooldown=0.3)
+        self.debounce.configure("right click", cooldown=0.3)
+        self.debounce.configure("double click", cooldown=0.6)
+        self.debounce.configure("mode", cooldown=0.5)
+        self.debounce.configure("caps", cooldown=0.5)
+        self.key_rule = GestureRule(cooldown=0.3, repeat_delay=0.6, repeat_interval=0.3)
+
+        # volume, brightness, mouse and keyboard calls run on the actuator's worker thread
+        self.actuator = actuator if actuator is not None else Actuator()
+        # absolute, filtered pointer control; its thread starts with the first cursor gesture
+        self.cursor = CursorEngine(self.actuator.backend, cursor_region, refresh_rate=cursor_rate,
+                                   metrics=self.metrics)
+
+        # region-of-interest tracking: once a hand is found, only a crop around it
+        # (grown by roi_margin on each side, scaled down to roi_size) goes to the model
+        self.roi_tracking = roi_tracking
+        self.roi_size = roi_size
+        self.roi_margin = roi_margin
+        self.roi = None
+        # while the crop holds fewer than max_hands, the whole frame is searched every
+        # roi_rescan frames, so a second hand outside the crop is still found
+        self.roi_rescan = 10
+        self.roi_hands = 0
+        self.frames_in_roi = 0
+        # whether the graph was last fed a crop, see use_graph_on
+        self.graph_on_crop = False
+
+        # predictive tracking: run the model every inference_stride frames, or as often as
+        # inference_budget (seconds of inference per frame) allows, and predict in between.
+        # A prediction further than resync_error off the next detection forces inference
+        # on every frame until the motion model catches up.
+        self.inference_stride = inference_stride
+        self.inference_budget = inference_budget
+        self.resync_error = resync_error
+        self.predictor = LandmarkPredictor() if inference_stride > 1 or inference_budget else None
+        self.stride = inference_stride
+        self.frames_since_inference = 0
+
+        # frame_budget (seconds of inference per frame): step complexity, resolution and
+        # max hands down when inference is too slow for it, and back up when there is room
+        self.budget = BudgetController(self, frame_budget) if frame_budget else None
+
+        # idle_after (seconds without a hand): stop running the model on every frame and only
+        # look again when the picture changes, or every idle_heartbeat seconds
+        self.idle = IdleGate(idle_after, idle_heartbeat) if idle_after else None
+
+        # SessionRecorder fed by handle_gestures, see start_recording
+        self.recorder = None
+        # LandmarkPublisher fed by handle_gestures, see start_publishing
+        self.publisher = None
+
+        # finger code -> gesture tables per mode; bind more with self.dispatcher.bind
+        self.dispatcher = GestureDispatcher()
+        self.bind_default_gestures()
+        # names of the gestures that acted in the current frame, for the recorder, publisher
+        # and hand_frames; handlers add themselves and handle_gestures starts the list afresh
+        self.fired = []
+
+        # gestures over the last frames (swipes, flicks, hold, pinch and drag) on top of
+        # the per-frame finger codes; bind more with self.temporal.bind
+        self.temporal = TemporalGestures() if temporal_gestures else None
+        self.dragging = False
+        if self.temporal is not None:
+            self.bind_default_temporal_gestures()
+
+    def bind_default_gestures(self):
+        # patterns are thumb, index, middle, ring, pinky: 1 up, 0 down, x either
+        bind = self.dispatcher.bind
+        bind(VOLUME_MODE, "xx001", "volume", HandDetection.volume_gesture)
+        bind(BRIGHTNESS_MODE, "xx001", "brightness", HandDetection.brightness_gesture)
+        bind(MOUSE_MODE, "01100", "cursor", HandDetection.cursor_gesture)
+        bind(MOUSE_MODE, "01000", "left click", HandDetection.left_click_gesture)
+        bind(MOUSE_MODE, "00100", "right click", HandDetection.right_click_gesture)
+        bind(MOUSE_MODE, "01101", "double click", HandDetection.double_click_gesture)
+        bind(MOUSE_MODE, "01111", "scroll up", HandDetection.scroll_up_gesture)
+        bind(MOUSE_MODE, "01110", "scroll down", HandDetection.scroll_down_gesture)
+        # the keyboard is drawn on every frame, hand or not
+        bind(KEYBOARD_MODE, "*", "keyboard", HandDetection.hand_keyboard)
+
+    def bind_default_temporal_gestures(self):
+        # mode (None for all), event, finger pattern, name, handler
+        bind = self.temporal.bind
+        bind(None, "swipe_left", "x1111", "previous mode", HandDetection.previous_mode_gesture)
+        bind(None, "swipe_right", "x1111", "next mode", HandDetection.next_mode_gesture)
+        # a short pinch clicks, a pinch that moves drags; only from the pinch pose, thumb and index
+        # out and the other fingers folded, so a fist or a closing hand does not press the button
+        bind(MOUSE_MODE, "pinch_start", "11000", "drag start", HandDetection.drag_start_gesture)
+        bind(MOUSE_MODE, "drag", "*", "drag", HandDetection.drag_gesture)
+        # in every mode, so a mode change or a lost hand never leaves the button down
+        bind(None, "pinch_end", "*", "drag end", HandDetection.drag_end_gesture)
+        bind(MOUSE_MODE, "flick_up", "x111x", "flick scroll up", HandDetection.flick_scroll_up_gesture)
+        bind(MOUSE_MODE, "flick_down", "x111x", "flick scroll down", HandDetection.flick_scroll_down_gesture)
+        # hold is left unbound: an open palm resting still is the idle pose in mouse mode
+
+    def configure(self, model_complexity=None, max_hands=None, max_side=None,
+                  detection_confidence=None, tracking_confidence=None):
+        """
+        Change the model settings at runtime, None keeps a setting. max_side only
+        changes what process() is given; the MediaPipe graph is rebuilt only when
+        one of its own options changed. Returns True if it was rebuilt.
+        """
+        if max_side is not None:
+            self.max_side = max_side
+        graph = (self.max_hands, self.model_complexity, self.detection_confidence, self.tracking_confidence)
+        new_graph = tuple(old if new is None else new for old, new in
+                          zip(graph, (max_hands, model_complexity, detection_confidence, tracking_confidence)))
+        if new_graph == graph:
+            return False
+        self.max_hands, self.model_complexity, self.detection_confidence, self.tracking_confidence = new_graph
+        self.hands.close()
+        self.hands = self.mp_hands.Hands(self.mode, self.max_hands,
+                                         self.model_complexity, self.detection_confidence,
+                                         self.tracking_confidence)
+        self.roi = None
+        self.graph_on_crop = False
+        return True
+
+    def detect(self, image):
+        # Only the MediaPipe graph, the ROI, the predictor and the idle gate are touched here, so
+        # the pipeline can run this on its inference thread while the previous frame is being rendered.
+        if self.idle is None:
+            return self.track(image)
+        with self.metrics.time("idle_gate"):
+            run = self.idle.should_detect(image)
+        if not run:
+            return HandResults()
+        results = self.track(image)
+        self.idle.observe(bool(results.multi_hand_landmarks))
+        return results
+
+    def track(self, image):
+        # inference, or a prediction on the frames predictive tracking skips
+        now = time.perf_counter()
+        if self.predictor is None:
+            return self.infer(image)
+
+        if self.predictor.can_predict() and self.frames_since_inference + 1 < self.stride:
+            self.frames_since_inference += 1
+            return self.predictor.predict(now)
+
+        self.frames_since_inference = 0
+        results = self.infer(image)
+        error = self.predictor.observe(results, now)
+
+        if error is not None and error > self.resync_error:
+            self.stride = 1
+        elif self.inference_budget:
+            self.stride = max(1, math.ceil((time.perf_counter() - now) / self.inference_budget))
+        else:
+            self.stride = self.inference_stride
+        return results
+
+    def infer(self, image):
+        start = time.perf_counter()
+        if self.roi is not None:
+            self.frames_in_roi += 1
+            if self.roi_hands < self.max_hands and self.frames_in_roi >= self.roi_rescan:
+                self.roi = None
+
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            self.use_graph_on(crop=True)
+            results = self.process(image[y0:y1, x0:x1], self.roi_size)
+            if results.multi_hand_landmarks:
+                self.crop_to_frame(results, self.roi, image.shape)
+            else:
+                # hand lost, look at the whole frame again
+                self.roi = None
+
+        if self.roi is None:
+            self.frames_in_roi = 0
+            self.use_graph_on(crop=False)
+            results = self.process(image, self.max_side)
+
+        if self.roi_tracking:
+            self.roi = self.next_roi(results, image.shape)
+            self.roi_hands = len(results.multi_hand_landmarks or ())
+        if self.budget is not None:
+            # on the inference thread, so a graph rebuilt by configure is never in use elsewhere
+            self.budget.observe(time.perf_counter() - start)
+        return results
+
+    def use_graph_on(self, crop):
+        # the tracking graph carries the last landmarks over in the coordinates of the image they
+        # came from, so when crops and full frames take turns it starts over with a palm detection
+        if crop != self.graph_on_crop:
+            self.hands.reset()
+            self.graph_on_crop = crop
+
+    def process(self, image, max_side=None):
+        if max_side and max(image.shape[:2]) > max_side:
+            scale = max_side / max(image.shape[:2])
+            size = (round(image.shape[1] * scale), round(image.shape[0] * scale))
+            with self.metrics.time("resize"):
+                image = cv2.resize(image, size, dst=self.buffers.get((size[1], size[0], 3)),
+                                   interpolation=cv2.INTER_AREA)
+
+        # Convert the image to RGB format, into a reused buffer
+        with self.metrics.time("color_conversion"):
+            image_in_rgb_format = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=self.buffers.get(image.shape))
+
+        # Process the image with MediaPipe hands detection
+        with self.metrics.time("hands_process"):
+            return self.hands.process(read_only(image_in_rgb_format))
+
+    @staticmethod
+    def crop_to_frame(results, crop, shape):
+        # landmarks are normalized to the crop, map them back to the full frame
+        x0, y0, x1, y1 = crop
+        h, w = shape[:2]
+        sx, sy = (x1 - x0) / w, (y1 - y0) / h
+        ox, oy = x0 / w, y0 / h
+        for hand_landmarks in results.multi_hand_landmarks:
+            for lm in hand_landmarks.landmark:
+                lm.x = ox + lm.x * sx
+                lm.y = oy + lm.y * sy
+                lm.z = lm.z * sx
+
+    def next_roi(self, results, shape):
+        # square crop around all detected hands, None to use the full frame
+        if not results.multi_hand_landmarks:
+            return None
+        h, w = shape[:2]
+        points = np.array([(lm.x * w, lm.y * h) for hand_landmarks in results.multi_hand_landmarks
+                           for lm in hand_landmarks.landmark])
+        (x_min, y_min), (x_max, y_max) = points.min(axis=0), points.max(axis=0)
+        side = max(x_max - x_min, y_max - y_min) * (1 + 2 * self.roi_margin)
+        cx, cy = (x_min + x_max) / 2, (y_min + y_max) / 2
+        x0, y0 = max(int(cx - side / 2), 0), max(int(cy - side / 2), 0)
+        x1, y1 = min(int(cx + side / 2), w), min(int(cy + side / 2), h)
+        # a crop covering most of the frame saves nothing
+        if x1 - x0 < 16 or y1 - y0 < 16 or (x1 - x0) * (y1 - y0) > 0.6 * w * h:
+            return None
+        return x0, y0, x1, y1
 
     def find_hands(self, image, draw=True):
-        # Convert the image to RGB format
-        image_in_rgb_format = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        return self.use_results(image, self.detect(image), draw)
 
-        # Process the image with MediaPipe hands detection
-        self.results = self.hands.process(image_in_rgb_format)
+    def use_results(self, image, results, draw=True):
+        # make `results` the current detection for find_position and the controllers
+        self.results = results
 
         if self.results.multi_hand_landmarks:
             for hand_landmarks in self.results.multi_hand_landmarks:
@@ -85,52 +422,84 @@ class HandDetection:
         return image
 
     def find_position(self, image, hand_no=0, draw=True):
-        list_x = []
-        list_y = []
-
+        # hand_no None follows the tracked hand, see select_hand
         self.list_of_lm = []
-        if self.results.multi_hand_landmarks:
+        self.finger_code = NO_HAND
+        h, w = image.shape[:2]
+        with self.metrics.time("landmarks"):
+            frame = self.landmarks.update(self.results, w, h)
+        if hand_no is None:
+            with self.metrics.time("track_hands"):
+                hand_no = self.select_hand(image, draw)
+        if hand_no is not None and frame.count > hand_no:
             # select a hand
-            my_hand = self.results.multi_hand_landmarks[hand_no]
-            # store hand landmark position in to a list
-            for ID, LM in enumerate(my_hand.landmark):
-                h, w, c = image.shape
-                cx, cy = int(LM.x * w), int(LM.y * h)
-                list_x.append(cx)
-                list_y.append(cy)
-                self.list_of_lm.append([ID, cx, cy])
-
-                # highlight the hand
-                if draw:
-                    cv2.circle(image, (cx, cy), 5, (255, 0, 255), 1)
-            x_min, x_max = min(list_x), max(list_x)
-            y_min, y_max = min(list_y), max(list_y)
-            self.bbox = [x_min, y_min, x_max, y_max]
+            self.hand_no = hand_no
+            self.list_of_lm = frame.list_of_lm(hand_no)
+            self.bbox = frame.bboxes()[hand_no].tolist()
+
+            # highlight the hand
             if draw:
+                for cx, cy in frame.pixels[hand_no].tolist():
+                    cv2.circle(image, (cx, cy), 5, (255, 0, 255), 1)
                 cv2.rectangle(image, (self.bbox[0] - 10, self.bbox[1] - 10), (self.bbox[2] + 10, self.bbox[3] + 10),
                               (0, 255, 0), 2)
         return self.list_of_lm, self.bbox, image
 
-    def fingers_up(self):
-        self.fingers = []
-        # Thumb
-        if self.list_of_lm[self.tipIds[0]][1] > self.list_of_lm[self.tipIds[0] - 1][1]:
-            self.fingers.append(1)
+    def select_hand(self, image, draw=True):
+        # index of the hand to follow this frame, None when no hand has the control role
+        frame = self.landmarks
+        if self.tracker is None:
+            return 0
+        self.tracker.update(frame.data[:frame.count], self.handedness_labels())
+        if not self.hand_roles:
+            return self.tracker.primary()
+
+        # the hand tracked longest wins when two hands claim the same role
+        self.role_hands = {}
+        for i in np.argsort(self.tracker.ids).tolist():
+            role = self.hand_roles.get(self.tracker.handedness(i))
+            if role is not None:
+                self.role_hands.setdefault(role, i)
+
+        mode_hand = self.role_hands.get("mode")
+        if mode_hand is not None:
+            self.mode_hand(mode_hand, image, draw)
         else:
-            self.fingers.append(0)
-        # 4 Fingers
-        for ID in range(1, 5):
-            if self.list_of_lm[self.tipIds[ID]][2] < self.list_of_lm[self.tipIds[ID] - 2][2]:
-                self.fingers.append(1)
-            else:
-                self.fingers.append(0)
+            self.mode_candidate = None
+        return self.role_hands.get("control")
+
+    def mode_hand(self, i, image, draw=True):
+        # the number of fingers held up (thumb aside) for a moment picks the mode
+        count = bin(int(self.landmarks.codes()[i]) & (INDEX | MIDDLE | RING | PINKY)).count("1")
+        now = time.monotonic()
+        if count != self.mode_candidate:
+            self.mode_candidate, self.mode_since = count, now
+        elif count and now - self.mode_since >= 0.3 and self.mode != count - 1:
+            self.mode = count - 1
+            self.fired.append("mode hand")
+
+        if draw:
+            x0, y0 = self.landmarks.bboxes()[i, :2].tolist()
+            cv2.putText(image, f"mode hand: {count}", (x0, max(y0 - 20, 20)), cv2.FONT_HERSHEY_PLAIN, 2,
+                        (160, 114, 0), 2)
+
+    def handedness_labels(self):
+        """MediaPipe's "Left"/"Right" label of each detected hand, [] without hands."""
+        if not self.landmarks.count or not self.results.multi_handedness:
+            return []
+        return [hand.classification[0].label for hand in self.results.multi_handedness]
+
+    def fingers_up(self):
+        # thumb compares x with the joint below it, the other fingers compare y with the pip joint
+        self.fingers = self.landmarks.fingers()[self.hand_no].tolist()
+        self.finger_code = int(self.landmarks.codes()[self.hand_no])
         return self.fingers
 
-    def show_fps(self, image):
-        # Calculate FPS (frames per second)
-        self.current_time = time.time()
-        fps = 1 / (self.current_time - self.previous_time)
-        self.previous_time = self.current_time
+    def show_fps(self, image, draw=True):
+        # FPS (frames per second), smoothed over frames on the monotonic clock
+        fps = self.metrics.tick()
+        if not draw:
+            return image
 
         # Display FPS on image (properly indented)
         cv2.putText(image, f'FPS: {int(fps)}', (10, 70), cv2.FONT_HERSHEY_PLAIN, 2, (255, 0, 0), 2)
@@ -139,8 +508,9 @@ class HandDetection:
 
     def find_distance(self, image, point_1, point_2, draw=True):
 
-        x1, y1 = self.list_of_lm[point_1][1], self.list_of_lm[point_1][2]
-        x2, y2 = self.list_of_lm[point_2][1], self.list_of_lm[point_2][2]
+        pixels = self.landmarks.pixels[self.hand_no]
+        x1, y1 = pixels[point_1].tolist()
+        x2, y2 = pixels[point_2].tolist()
 
         # find center of line and colour it
         cx, cy = (x2 + x1) // 2, (y2 + y1) // 2
@@ -152,213 +522,194 @@ class HandDetection:
             cv2.circle(image, (cx, cy), 5, (255, 0, 255), 5, cv2.FILLED)
 
         # distance btw the two points
-        distance = math.hypot(x1 - x2, y1 - y2)
+        distance = float(self.landmarks.distances(point_1, point_2)[self.hand_no])
 
         return image, distance, [x1, y1, x2, y2, cx, cy]
 
     def volume_controller(self, image, draw=True):
-        devices = AudioUtilities.GetSpeakers()
-        interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-        volume = interface.QueryInterface(IAudioEndpointVolume)
+        # runs volume_gesture when the fingers match its binding
+        return self.dispatcher.dispatch(self, VOLUME_MODE, self.finger_code, image, draw, ("volume",))
 
-        if len(self.list_of_lm):
+    def volume_gesture(self, image, draw=True):
+        # bound to finger 2,3 down and 4 up
+        # filter based on size
+        area = ((self.bbox[2] - self.bbox[0]) * (self.bbox[3] - self.bbox[1])) // 100
 
-            # do following if finger 2,3 is down and 4 is up
-            if self.fingers[4] and not self.fingers[2] and not self.fingers[3]:
-                # filter based on size
-                area = ((self.bbox[2] - self.bbox[0]) * (self.bbox[3] - self.bbox[1])) // 100
+        if 150 < area < 1000:
 
-                if 150 < area < 1000:
+            # draw line btw thump and index, find distance btw them
+            image, distance, line_info = self.find_distance(image, 4, 8, draw=draw)
 
-                    # draw line btw thump and index, find distance btw them
-                    image, distance, line_info = self.find_distance(image, 4, 8, draw=draw)
+            # covert volume
+            vol_bar = np.interp(distance, [50, 180], [400, 150])
+            vol_per = np.interp(distance, [50, 180], [0, 100])
 
-                    # covert volume
-                    vol_bar = np.interp(distance, [50, 180], [400, 150])
-                    vol_per = np.interp(distance, [50, 180], [0, 100])
+            # reduce resolution to make smoother
+            smoothness = 10
+            vol_per = round(int(vol_per) / smoothness) * smoothness
 
-                    # reduce resolution to make smoother
-                    smoothness = 10
-                    vol_per = round(int(vol_per) / smoothness) * smoothness
+            # set volume, unchanged levels are dropped by the actuator
+            self.actuator.set_volume(vol_per)
+            self.fired.append("volume")
+            print("volume control")
 
-                    # set volume
-                    volume.SetMasterVolumeLevelScalar(vol_per / 100, None)
-                    print("volume control")
-
-                    # drawing
-                    if draw:
-                        if distance < 50:  # colour center point green/red when distance is min/max
-                            cv2.circle(image, (line_info[4], line_info[5]), 5, (0, 255, 0), 5, cv2.FILLED)
-                        elif distance >= 180:
-                            cv2.circle(image, (line_info[4], line_info[5]), 5, (0, 0, 255), 5, cv2.FILLED)
+            # drawing
+            if draw:
+                if distance < 50:  # colour center point green/red when distance is min/max
+                    cv2.circle(image, (line_info[4], line_info[5]), 5, (0, 255, 0), 5, cv2.FILLED)
+                elif distance >= 180:
+                    cv2.circle(image, (line_info[4], line_info[5]), 5, (0, 0, 255), 5, cv2.FILLED)
 
-                        cv2.putText(image, f'{int(vol_per)} %',
-                                    (50, 450), cv2.FONT_HERSHEY_PLAIN, 2, (255, 0, 0), 2)  # volume percentage on screen
+                cv2.putText(image, f'{int(vol_per)} %',
+                            (50, 450), cv2.FONT_HERSHEY_PLAIN, 2, (255, 0, 0), 2)  # volume percentage on screen
 
-                        cv2.rectangle(image, (50, 150), (85, 400), (255, 0, 0), 3)  # volume meter on screen
-                        cv2.rectangle(image, (50, int(vol_bar)), (85, 400), (255, 0, 0), cv2.FILLED)
+                cv2.rectangle(image, (50, 150), (85, 400), (255, 0, 0), 3)  # volume meter on screen
+                cv2.rectangle(image, (50, int(vol_bar)), (85, 400), (255, 0, 0), cv2.FILLED)
 
-                        current_volume = int(volume.GetMasterVolumeLevelScalar() * 100)
-                        cv2.putText(image, f'Volume: {current_volume}', (1000, 50), cv2.FONT_HERSHEY_PLAIN,
-                                    2, (255, 0, 0), 2)
+                current_volume = self.actuator.current.get("volume", "--")
+                cv2.putText(image, f'Volume: {current_volume}', (1000, 50), cv2.FONT_HERSHEY_PLAIN,
+                            2, (255, 0, 0), 2)
 
         return image
 
     def brightness_controller(self, image, draw=True):
+        # runs brightness_gesture when the fingers match its binding
+        return self.dispatcher.dispatch(self, BRIGHTNESS_MODE, self.finger_code, image, draw, ("brightness",))
 
-        if len(self.list_of_lm):
-
-            # do following if finger 3,4 is down and 2 is up
-            if self.fingers[4] and not self.fingers[2] and not self.fingers[3]:
-                # filter based on size
-                area = ((self.bbox[2] - self.bbox[0]) * (self.bbox[3] - self.bbox[1])) // 100
+    def brightness_gesture(self, image, draw=True):
+        # bound to finger 2,3 down and 4 up
+        # filter based on size
+        area = ((self.bbox[2] - self.bbox[0]) * (self.bbox[3] - self.bbox[1])) // 100
 
-                if 150 < area < 1000:
+        if 150 < area < 1000:
 
-                    # draw line btw thump and index, find distance btw them
-                    image, distance, line_info = self.find_distance(image, 4, 8, draw=draw)
+            # draw line btw thump and index, find distance btw them
+            image, distance, line_info = self.find_distance(image, 4, 8, draw=draw)
 
-                    # covert brightness
-                    bri_bar = np.interp(distance, [50, 180], [400, 150])
-                    bri_per = np.interp(distance, [50, 180], [0, 100])
+            # covert brightness
+            bri_bar = np.interp(distance, [50, 180], [400, 150])
+            bri_per = np.interp(distance, [50, 180], [0, 100])
 
-                    # reduce resolution to make smoother
-                    smoothness = 10
-                    bri_per = round(int(bri_per) / smoothness) * smoothness
+            # reduce resolution to make smoother
+            smoothness = 10
+            bri_per = round(int(bri_per) / smoothness) * smoothness
 
-                    # set brightness
-                    sbc.set_brightness(bri_per)
-                    print("brightness control")
-                    # drawing
-                    if draw:
-                        if distance < 50:  # colour center point green/red when distance is min/max
-                            cv2.circle(image, (line_info[4], line_info[5]), 5, (0, 255, 0), 5, cv2.FILLED)
-                        elif distance >= 180:
-                            cv2.circle(image, (line_info[4], line_info[5]), 5, (0, 0, 255), 5, cv2.FILLED)
+            # set brightness, unchanged levels are dropped by the actuator
+            self.actuator.set_brightness(bri_per)
+            self.fired.append("brightness")
+            print("brightness control")
+            # drawing
+            if draw:
+                if distance < 50:  # colour center point green/red when distance is min/max
+                    cv2.circle(image, (line_info[4], line_info[5]), 5, (0, 255, 0), 5, cv2.FILLED)
+                elif distance >= 180:
+                    cv2.circle(image, (line_info[4], line_info[5]), 5, (0, 0, 255), 5, cv2.FILLED)
 
-                        cv2.putText(image, f'{int(bri_per)} %',
-                                    (50, 450), cv2.FONT_HERSHEY_PLAIN, 2, (255, 0, 255),
-                                    2)  # volume percentage on screen
+                cv2.putText(image, f'{int(bri_per)} %',
+                            (50, 450), cv2.FONT_HERSHEY_PLAIN, 2, (255, 0, 255),
+                            2)  # volume percentage on screen
 
-                        cv2.rectangle(image, (50, 150), (85, 400), (255, 0, 255), 3)  # volume meter on screen
-                        cv2.rectangle(image, (50, int(bri_bar)), (85, 400), (255, 0, 255), cv2.FILLED)
+                cv2.rectangle(image, (50, 150), (85, 400), (255, 0, 255), 3)  # volume meter on screen
+                cv2.rectangle(image, (50, int(bri_bar)), (85, 400), (255, 0, 255), cv2.FILLED)
 
-                        current_brightness = sbc.get_brightness()
-                        cv2.putText(image, f'Brightness: {current_brightness}', (950, 50), cv2.FONT_HERSHEY_PLAIN,
-                                    2, (255, 0, 255), 2)
+                current_brightness = self.actuator.current.get("brightness", "--")
+                cv2.putText(image, f'Brightness: {current_brightness}', (950, 50), cv2.FONT_HERSHEY_PLAIN,
+                            2, (255, 0, 255), 2)
 
         return image
 
-    # def cursor_move(self, webcam_width, webcam_height):
-    #     wScr, hScr = autopy.screen.size()
-    #
-    #     frame_reduction = 100
-    #     smoothening = 7
-    #
-    #     if len(self.list_of_lm):
-    #         if self.fingers[1] == 1 and self.fingers[2] == 1 and self.fingers[3] == 0 and self.fingers[4] == 0 and \
-    #                 self.fingers[0] == 0:
-    #             mode = "move"
-    #             x1, y1 = self.list_of_lm[9][1:]
-    #             x = np.interp(x1, (frame_reduction, webcam_width - frame_reduction), (0, wScr))
-    #             y = np.interp(y1, (frame_reduction, webcam_height - frame_reduction), (0, hScr))
-    #             clocX = self.plocX + (x - self.plocX) / smoothening
-    #             clocY = self.plocY + (y - self.plocY) / smoothening
-    #             autopy.mouse.move(clocX, clocY)
-    #             self.plocX, self.plocY = clocX, clocY
-
     def cursor_move(self, image):
-        # centre_x = webcam_width // 2
-        # centre_y = webcam_height // 2
-
-        # rect_width = 200
-        # rect_height = 100
-        # center_x = int(webcam_width / 2)
-        # center_y = int(webcam_height / 2)
-        # # Calculate top-left corner coordinates
-        # top_left_x = center_x - int(rect_width / 2)
-        # top_left_y = center_y - int(rect_height / 2)
-        # bottom_right_x = top_left_x + rect_width
-        # bottom_right_y = top_left_y + rect_height
-        # # Draw rectangle using cv2.rectangle
-        # cv2.rectangle(image, (top_left_x, top_left_y), (bottom_right_x, bottom_right_y),
-        #               (0, 255, 0), 2)  # Green rectangle with thickness 2
-
-        if len(self.list_of_lm):
-            if self.fingers[1] == 1 and self.fingers[2] == 1 and self.fingers[3] == 0 and self.fingers[4] == 0 and \
-                    self.fingers[0] == 0:
-                current_x, current_y = self.list_of_lm[self.tipIds[1]][1], self.list_of_lm[self.tipIds[1]][2]
-
-                # if top_left_x < current_x < bottom_right_x and top_left_y < current_y < bottom_right_y:
-                # dx = 50 if current_x > self.previous_position_x else -50
-                # dy = 30 if current_y > self.previous_position_y else -30
-                if current_x > self.previous_position_x + 10:
-                    dx = -50
-                elif current_x < self.previous_position_x - 10:
-                    dx = 50
-                else:
-                    dx = 0
-
-                if current_y > self.previous_position_y + 10:
-                    dy = 50
-                elif current_y < self.previous_position_y - 10:
-                    dy = -50
-                else:
-                    dy = 0
+        # runs cursor_gesture when the fingers match its binding
+        return self.dispatcher.dispatch(self, MOUSE_MODE, self.finger_code, image, True, ("cursor",))
 
-                pyautogui.FAILSAFE = False
-                pyautogui.moveRel(dx, dy, 0)
+    def cursor_gesture(self, image, draw=True):
+        # bound to index and middle finger up: the index fingertip inside the active region
+        # is mapped to the whole screen, the cursor thread moves the pointer between frames
+        x, y = self.landmarks.data[self.hand_no, self.tipIds[1], :2].tolist()
+        self.cursor.update(x, y)
+        self.fired.append("cursor")
 
-                self.previous_position_x = current_x
-                self.previous_position_y = current_y
+        if draw:
+            h, w = image.shape[:2]
+            x0, y0, x1, y1 = self.cursor.region
+            cv2.rectangle(image, (int(x0 * w), int(y0 * h)), (int(x1 * w), int(y1 * h)), (255, 0, 255), 2)
         return image
 
     def click(self):
-        if len(self.list_of_lm):
-            if self.fingers[0] == 0 and self.fingers[1] == 1 and self.fingers[2] == 0 and self.fingers[3] == 0 and \
-                    self.fingers[4] == 0:
-
-                # autopy.mouse.click()
-                pyautogui.click(x=None, y=None, button='left', clicks=1, interval=0.3)
-                print("left click")
-                # self.wait(.3)
-
-            elif self.fingers[0] == 0 and self.fingers[1] == 0 and self.fingers[2] == 1 and self.fingers[3] == 0 and \
-                    self.fingers[4] == 0:
-                # autopy.mouse.click(autopy.mouse.Button.RIGHT)
-                pyautogui.click(x=None, y=None, button='right', clicks=1, interval=0.3)
-                print("right click")
-                # self.wait(.3)
-
-            elif self.fingers[0] == 0 and self.fingers[1] == 1 and self.fingers[2] == 1 and self.fingers[3] == 0 and \
-                    self.fingers[4] == 1:
-                pyautogui.doubleClick(x=None, y=None, interval=0)
-                time.sleep(0.3)
-                print("double click")
+        # left, right or double click, whichever the fingers are bound to
+        self.dispatcher.dispatch(self, MOUSE_MODE, self.finger_code, None, True,
+                                 ("left click", "right click", "double click"))
+
+    def left_click_gesture(self, image, draw=True):
+        if self.debounce.fire("left click"):
+            self.actuator.send("click", "left")
+            self.fired.append("left click")
+            print("left click")
+
+    def right_click_gesture(self, image, draw=True):
+        if self.debounce.fire("right click"):
+            self.actuator.send("click", "right")
+            self.fired.append("right click")
+            print("right click")
+
+    def double_click_gesture(self, image, draw=True):
+        if self.debounce.fire("double click"):
+            self.actuator.send("double_click")
+            self.fired.append("double click")
+            print("double click")
 
     def scroll(self):
-        if len(self.list_of_lm):
-            if not self.fingers[0] and self.fingers[1] and self.fingers[2] and self.fingers[3]:
-                if self.fingers[4]:
-                    pyautogui.scroll(120)
-                    print("scroll up")
-                else:
-                    pyautogui.scroll(-120)
-                    print("scroll down")
-
-    # def click_and_drag(self):
-    #     if len(self.list_of_lm):
-    #         x, distance, y = self.find_distance(None, 4, 8, False)
-    #         if self.fingers[2] and self.fingers[3] and self.fingers[4]:
-    #             if distance < 30:
-    #
-    #                 print("drag")
-
-    # def wait(self, seconds):
-    #     current_time = time.time()
-    #     future_time = current_time + seconds
-    #     while time.time() < future_time:
-    #         pass  # Empty statement (does nothing)
+        self.dispatcher.dispatch(self, MOUSE_MODE, self.finger_code, None, True, ("scroll up", "scroll down"))
+
+    def scroll_up_gesture(self, image, draw=True):
+        self.actuator.send("scroll", 120)
+        self.fired.append("scroll up")
+        print("scroll up")
+
+    def scroll_down_gesture(self, image, draw=True):
+        self.actuator.send("scroll", -120)
+        self.fired.append("scroll down")
+        print("scroll down")
+
+    def drag_start_gesture(self, image, draw=True):
+        self.actuator.send("mouse_down", "left")
+        self.dragging = True
+        self.fired.append("drag start")
+        print("drag start")
+
+    def drag_gesture(self, image, draw=True):
+        # the cursor follows the point between thumb and index tip while pinched
+        if self.dragging and self.list_of_lm:
+            x, y = self.landmarks.data[self.hand_no, [4, 8], :2].mean(axis=0).tolist()
+            self.cursor.update(x, y)
+            self.fired.append("drag")
+
+    def drag_end_gesture(self, image, draw=True):
+        if self.dragging:
+            self.actuator.send("mouse_up", "left")
+            self.dragging = False
+            self.fired.append("drag end")
+            print("drag end")
+
+    def flick_scroll_up_gesture(self, image, draw=True):
+        self.actuator.send("scroll", 5 * 120)
+        self.fired.append("flick scroll up")
+        print("flick scroll up")
+
+    def flick_scroll_down_gesture(self, image, draw=True):
+        self.actuator.send("scroll", -5 * 120)
+        self.fired.append("flick scroll down")
+        print("flick scroll down")
+
+    def previous_mode_gesture(self, image, draw=True):
+        if self.debounce.fire("mode"):
+            self.mode = (self.mode - 1) % 4
+            self.fired.append("previous mode")
+
+    def next_mode_gesture(self, image, draw=True):
+        if self.debounce.fire("mode"):
+            self.mode = (self.mode + 1) % 4
+            self.fired.append("next mode")
 
     # keyboard
     def cornerRect(self, img, bbox, length=30, t=5, rt=1,
@@ -413,60 +764,68 @@ class HandDetection:
                     button_list.append(Button([100 * j + 50, 100 * i + 50], key))
         return button_list
 
-    def hand_keyboard(self, image):
-        button_list = self.assign()
-        image = self.drawAll(image, button_list)
+    def keyboard_layout(self, width, height):
+        key = (self.caps, width, height)
+        layout = self.keyboard_layouts.get(key)
+        if layout is None:
+            layout = self.keyboard_layouts[key] = KeyboardLayout(self.assign(), self.drawAll, width, height)
+        return layout
+
+    def hand_keyboard(self, image, draw=True):
+        layout = self.keyboard_layout(image.shape[1], image.shape[0])
+        if draw:
+            image = layout.draw(image)
         if self.list_of_lm:
-            if not self.caps:
-                keyboard.press("shift")
-            else:
-                keyboard.release("shift")
-            # print(button_list[0].text, button_list[0].size, button_list[0].pos)
-            # print(lmList[8][1], lmList[8][2])
-            for button in button_list:
+            button = layout.hit(self.list_of_lm[8][1], self.list_of_lm[8][2])
+            if button is not None:
                 x, y = button.pos
                 w, h = button.size
 
-                if x < self.list_of_lm[8][1] < x + w and y < self.list_of_lm[8][2] < y + h:
+                if draw:
                     cv2.rectangle(image, (x - 5, y - 5), (x + w + 5, y + h + 5), (175, 0, 175), cv2.FILLED)
                     cv2.putText(image, button.text, (x + 20, y + 65),
                                 cv2.FONT_HERSHEY_PLAIN, 4, (255, 255, 255), 4)
 
-                    # print(l)
+                # print(l)
 
-                    # _, l, _ = self.find_distance(image, 8, 12, draw=False)
-                    # when clicked
-                    # if l < 50:
-                    if self.fingers[1] and not self.fingers[2]:
-                        letter = str(button.text)
+                # _, l, _ = self.find_distance(image, 8, 12, draw=False)
+                # when clicked
+                # if l < 50:
+                if self.finger_code & (INDEX | MIDDLE) == INDEX:
+                    letter = str(button.text)
+                    if letter == "CAP":
+                        fired = self.debounce.fire("caps")
+                    else:
+                        # every key has its own edge, so sliding onto the next key types it
+                        fired = self.debounce.fire("key " + letter, self.key_rule)
+                    if fired:
+                        # shift is held around the key itself rather than toggled every frame
+                        shift = not self.caps and letter != "CAP"
+                        if shift:
+                            self.actuator.send("key_press", "shift")
                         if len(letter) == 1:
                             if not letter.islower():
                                 letter = letter.lower()
-                            keyboard.send(letter)
+                            self.actuator.send("key_send", letter)
                         elif letter == "SPC":
-                            keyboard.press("space")
+                            self.actuator.send("key_press", "space")
                         elif letter == "<--":
-                            keyboard.press("backspace")
+                            self.actuator.send("key_press", "backspace")
                         elif letter == "ENT":
-                            keyboard.press("enter")
+                            self.actuator.send("key_press", "enter")
                         elif letter == "CAP":
                             self.caps = (self.caps + 1) % 2
-                            # if keyboard.is_pressed("caps_lock"):
-                            #     keyboard.press("caps_lock")
-                            # else:
-                            #     keyboard.release("caps_lock")
-                            time.sleep(0.2)
+                        if shift:
+                            self.actuator.send("key_release", "shift")
+                        self.fired.append("key " + button.text)
                         print(button.text)
+                    if draw:
                         cv2.rectangle(image, button.pos, (x + w, y + h), (0, 255, 0), cv2.FILLED)
                         cv2.putText(image, button.text, (x + 20, y + 65),
                                     cv2.FONT_HERSHEY_PLAIN, 4, (255, 255, 255), 4)
-                        # finalText += button.text
-                        time.sleep(0.3)
-            if not self.caps:
-                keyboard.release("shift")
         return image
 
-    def mode_select(self, image, webcam_width):
+    def mode_select(self, image, webcam_width, draw=True):
         border_space = 20  # Adjust this value to control the space from the border
 
         # Calculate center coordinates with adjusted space from border
@@ -486,7 +845,9 @@ class HandDetection:
         bottom_right_y = top_left_y + rectangle_height
 
         # Draw the rectangle with the specified color and filled option
-        cv2.rectangle(image, (top_left_x, top_left_y), (bottom_right_x, bottom_right_y), (160, 114, 0), cv2.FILLED)
+        if draw:
+            cv2.rectangle(image, (top_left_x, top_left_y), (bottom_right_x, bottom_right_y), (160, 114, 0),
+                          cv2.FILLED)
 
         # Text parameters
         font = cv2.FONT_HERSHEY_SIMPLEX  # Choose a suitable font
@@ -499,20 +860,82 @@ class HandDetection:
         text_y = int(top_left_y + rectangle_height - text_scale * 5)  # Place the text near the top of the rectangle
 
         # Add the text "mode 1"
-        cv2.putText(image, f"mode {self.mode}", (text_x, text_y), font, text_scale, text_color, text_thickness)
+        if draw:
+            cv2.putText(image, f"mode {self.mode}", (text_x, text_y), font, text_scale, text_color, text_thickness)
 
         if self.list_of_lm:
             # print(self.list_of_lm[8][1], self.list_of_lm[8][2])
 
             if (top_left_x < self.list_of_lm[8][1] < top_left_x + rectangle_width and top_left_y < self.list_of_lm[8][2]
                     < top_left_y + rectangle_height):
-                cv2.rectangle(image, (top_left_x, top_left_y), (bottom_right_x, bottom_right_y), (100, 71, 0),
-                              cv2.FILLED)
-                cv2.putText(image, f"mode {self.mode}", (text_x, text_y), font, text_scale, text_color, text_thickness)
+                if draw:
+                    cv2.rectangle(image, (top_left_x, top_left_y), (bottom_right_x, bottom_right_y), (100, 71, 0),
+                                  cv2.FILLED)
+                    cv2.putText(image, f"mode {self.mode}", (text_x, text_y), font, text_scale, text_color,
+                                text_thickness)
 
                 # when clicked
-                if self.fingers[1] and not self.fingers[2]:
+                if self.finger_code & (INDEX | MIDDLE) == INDEX and self.debounce.fire("mode"):
                     self.mode = (self.mode + 1) % 4
-                    time.sleep(0.5)
+                    self.fired.append("next mode")
+
+        return image
+
+    def handle_gestures(self, image, webcam_width, draw=True):
+        # everything that runs after detection: landmarks, mode button and the active mode's controllers.
+        # With draw=False nothing is painted on the frame and only the gestures and actions run.
+        self.debounce.tick()
+        self.fired = []
+        list_of_lm, bbox, image = self.find_position(image, None, draw)
+        if len(list_of_lm):
+            with self.metrics.time("fingers_up"):
+                self.fingers_up()
+
+        with self.metrics.time("mode_select"):
+            image = self.mode_select(image, webcam_width, draw)
+
+        # one table lookup picks the gestures of this mode and finger code
+        image = self.dispatcher.dispatch(self, self.mode, self.finger_code, image, draw)
+
+        if self.temporal is not None:
+            with self.metrics.time("temporal"):
+                image = self.temporal.dispatch(self, image, draw)
+
+        if self.recorder is not None:
+            with self.metrics.time("record"):
+                self.recorder.record(self)
+
+        if self.publisher is not None:
+            with self.metrics.time("publish"):
+                self.publisher.publish_detector(self)
 
         return image
+
+    def start_recording(self, path, capacity=108000):
+        # every frame handled from now on is appended to a memory-mapped session file
+        self.stop_recording()
+        self.recorder = SessionRecorder(path, capacity, max(self.max_hands, 1))
+        return self.recorder
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def start_publishing(self, port=DEFAULT_PORT, **options):
+        # every frame handled from now on is streamed to local subscribers, see StreamModule
+        self.stop_publishing()
+        self.publisher = LandmarkPublisher(port=port, **options)
+        return self.publisher
+
+    def stop_publishing(self):
+        if self.publisher is not None:
+            self.publisher.close()
+            self.publisher = None
+
+    def close(self):
+        # after the last frame: let go of a held drag, then stop the cursor and actuator
+        # threads, which apply the actions still queued (the mouse_up among them)
+        self.drag_end_gesture(None, False)
+        self.cursor.stop()
+        self.actuator.stop()
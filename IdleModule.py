@@ -0,0 +1,88 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class IdleGate:
+    """
+    Skips hand detection while nobody is in front of the camera.
+
+    Once no hand has been seen for `idle_after` seconds the gate goes idle.
+    Every frame is then shrunk to a small grayscale thumbnail and compared
+    with the previous one, and detection only runs when more than
+    `motion_threshold` of the thumbnail changed by over `pixel_threshold`
+    grey levels, or when `heartbeat` seconds have passed since the last
+    detection, which catches a hand that arrived without the gate noticing.
+    The first detection that finds a hand ends idling, so a hand moving into
+    view is detected on the frame it appears in and a still one within a
+    heartbeat.
+
+        gate = IdleGate()
+        if gate.should_detect(image):
+            results = detect(image)
+            gate.observe(bool(results.multi_hand_landmarks))
+    """
+
+    def __init__(self, idle_after=5.0, heartbeat=1.0, motion_threshold=0.01, pixel_threshold=12,
+                 size=(64, 36)):
+        self.idle_after = idle_after
+        self.heartbeat = heartbeat
+        self.motion_threshold = motion_threshold
+        self.pixel_threshold = pixel_threshold
+        self.size = size
+
+        # thumbnails are written in place, no allocation per frame
+        self.small = np.empty((size[1], size[0], 3), np.uint8)
+        # two grey buffers take turns as the current and the previous thumbnail
+        self.grey = [np.empty((size[1], size[0]), np.uint8) for _ in range(2)]
+        self.diff = np.empty((size[1], size[0]), np.uint8)
+        self.current = 0
+        self.has_previous = False
+
+        self.idle = False
+        self.last_hand = time.perf_counter()
+        self.last_detection = 0.0
+        self.motion = 0.0
+        self.skipped = 0
+        self.wakeups = 0
+
+    def should_detect(self, image, now=None):
+        """False when detection can be skipped for this frame."""
+        if not self.idle:
+            return True
+        now = time.perf_counter() if now is None else now
+        grey = self.grey[self.current]
+        # INTER_LINEAR reads a few pixels per output pixel, INTER_AREA would average
+        # the whole frame at a hundred times the cost
+        cv2.resize(image, self.size, dst=self.small, interpolation=cv2.INTER_LINEAR)
+        cv2.cvtColor(self.small, cv2.COLOR_BGR2GRAY, dst=grey)
+        moved = False
+        if self.has_previous:
+            cv2.absdiff(grey, self.grey[1 - self.current], dst=self.diff)
+            self.motion = int(np.count_nonzero(self.diff > self.pixel_threshold)) / self.diff.size
+            moved = self.motion > self.motion_threshold
+        self.current = 1 - self.current
+        self.has_previous = True
+
+        if moved or now - self.last_detection >= self.heartbeat:
+            return True
+        self.skipped += 1
+        return False
+
+    def observe(self, found, now=None):
+        """Report whether the detection that should_detect allowed found a hand."""
+        now = time.perf_counter() if now is None else now
+        self.last_detection = now
+        if found:
+            if self.idle:
+                self.wakeups += 1
+            self.idle = False
+            self.last_hand = now
+        elif not self.idle and now - self.last_hand >= self.idle_after:
+            self.idle = True
+            self.has_previous = False
+
+    def state(self):
+        return {"idle": self.idle, "motion": round(self.motion, 4), "skipped": self.skipped,
+                "wakeups": self.wakeups}
@@ -0,0 +1,81 @@
+import numpy as np
+
+NUM_LANDMARKS = 21
+# landmark each finger tip is compared against in fingers()
+THUMB_TIP, THUMB_IP = 4, 3
+FINGER_TIPS = np.array([8, 12, 16, 20])
+FINGER_PIPS = FINGER_TIPS - 2
+# bit of each finger in the packed code, thumb first
+FINGER_BITS = np.array([1, 2, 4, 8, 16], np.int32)
+
+
+class LandmarkFrame:
+    """
+    Landmarks of every detected hand in one frame, kept in preallocated arrays.
+
+    data   -- (max_hands, 21, 3) float32 normalized x, y, z from MediaPipe
+    pixels -- (max_hands, 21, 2) int32 pixel coordinates
+
+    Only the first `count` hands are valid. Pixel conversion, bounding boxes,
+    finger states and distances are computed for all hands at once.
+    """
+
+    def __init__(self, max_hands=1):
+        self.count = 0
+        self.width = 0
+        self.height = 0
+        self._allocate(max_hands)
+
+    def _allocate(self, max_hands):
+        self.data = np.zeros((max_hands, NUM_LANDMARKS, 3), np.float32)
+        self.pixels = np.zeros((max_hands, NUM_LANDMARKS, 2), np.int32)
+        self._scaled = np.zeros((max_hands, NUM_LANDMARKS, 2), np.float64)
+        self._bboxes = np.zeros((max_hands, 4), np.int32)
+        self._fingers = np.zeros((max_hands, 5), np.uint8)
+        self._ids = np.arange(NUM_LANDMARKS, dtype=np.int32)[:, None]
+
+    def update(self, results, width, height):
+        hands = (results.multi_hand_landmarks if results is not None else None) or ()
+        if len(hands) > len(self.data):
+            self._allocate(len(hands))
+
+        for i, hand_landmarks in enumerate(hands):
+            self.data[i] = [(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark]
+        self.count = n = len(hands)
+        self.width, self.height = width, height
+
+        if n:
+            # same truncation as int(LM.x * w) in double precision
+            np.multiply(self.data[:n, :, :2], (width, height), out=self._scaled[:n])
+            np.copyto(self.pixels[:n], self._scaled[:n], casting="unsafe")
+        return self
+
+    def bboxes(self):
+        """(count, 4) array of [x_min, y_min, x_max, y_max] per hand."""
+        n = self.count
+        np.min(self.pixels[:n], axis=1, out=self._bboxes[:n, :2])
+        np.max(self.pixels[:n], axis=1, out=self._bboxes[:n, 2:])
+        return self._bboxes[:n]
+
+    def fingers(self):
+        """(count, 5) array of finger-up flags per hand, thumb first."""
+        n = self.count
+        pixels = self.pixels[:n]
+        # thumb: tip right of the joint below it
+        np.greater(pixels[:, THUMB_TIP, 0], pixels[:, THUMB_IP, 0], out=self._fingers[:n, 0], casting="unsafe")
+        # other fingers: tip above the pip joint
+        np.less(pixels[:, FINGER_TIPS, 1], pixels[:, FINGER_PIPS, 1], out=self._fingers[:n, 1:], casting="unsafe")
+        return self._fingers[:n]
+
+    def codes(self):
+        """(count,) array of the five finger flags packed into one 5-bit code per hand."""
+        return self.fingers() @ FINGER_BITS
+
+    def distances(self, point_1, point_2):
+        """Pixel distance between two landmarks, for every hand."""
+        delta = self.pixels[:self.count, point_1] - self.pixels[:self.count, point_2]
+        return np.hypot(delta[:, 0], delta[:, 1])
+
+    def list_of_lm(self, hand_no=0):
+        """[[id, x, y], ...] for one hand, the format find_position has always returned."""
+        return np.hstack((self._ids, self.pixels[hand_no])).tolist()
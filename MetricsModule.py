@@ -0,0 +1,149 @@
+import json
+import threading
+import time
+
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-size float64 buffer keeping the last `size` samples."""
+
+    def __init__(self, size=512):
+        self.values = np.zeros(size, np.float64)
+        self.index = 0
+        self.count = 0
+
+    def add(self, value):
+        self.values[self.index] = value
+        self.index = (self.index + 1) % len(self.values)
+        if self.count < len(self.values):
+            self.count += 1
+
+    def samples(self):
+        return self.values[:self.count]
+
+
+class StageTimer:
+    """Context manager adding the elapsed monotonic time of its block to a stage."""
+
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """
+    Hot-path instrumentation: rolling latency samples per stage and an EMA frame rate.
+
+        with metrics.time("hands_process"):
+            results = hands.process(image)
+
+    Every stage keeps its last `window` durations in a RingBuffer, so memory
+    stays fixed however long the station runs. snapshot() gives p50/p95/p99
+    per stage, which can be written as JSON lines or served as Prometheus
+    text through serve().
+    """
+
+    def __init__(self, window=512, fps_smoothing=0.1):
+        self.window = window
+        self.fps_smoothing = fps_smoothing
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.totals = {}
+        self.fps = 0.0
+        self.frames = 0
+        self.previous_frame = None
+        self.server = None
+
+    def time(self, stage):
+        return StageTimer(self, stage)
+
+    def record(self, stage, duration):
+        with self.lock:
+            buffer = self.stages.get(stage)
+            if buffer is None:
+                buffer = self.stages[stage] = RingBuffer(self.window)
+                self.totals[stage] = [0, 0.0]
+            buffer.add(duration)
+            total = self.totals[stage]
+            total[0] += 1
+            total[1] += duration
+
+    def tick(self):
+        """Mark the end of a frame and update the EMA frame rate; returns it."""
+        now = time.perf_counter()
+        with self.lock:
+            self.frames += 1
+            if self.previous_frame is not None and now > self.previous_frame:
+                fps = 1 / (now - self.previous_frame)
+                # the first interval seeds the average instead of being blended with 0
+                self.fps = fps if self.frames == 2 else self.fps + self.fps_smoothing * (fps - self.fps)
+            self.previous_frame = now
+            return self.fps
+
+    def snapshot(self):
+        with self.lock:
+            stages = {}
+            for stage, buffer in self.stages.items():
+                samples = buffer.samples() * 1000
+                p50, p95, p99 = np.percentile(samples, (50, 95, 99))
+                count, total = self.totals[stage]
+                stages[stage] = {"count": count, "total_s": round(total, 6),
+                                 "p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3),
+                                 "p99_ms": round(float(p99), 3)}
+            return {"time": time.time(), "fps": round(self.fps, 2), "frames": self.frames, "stages": stages}
+
+    def write_jsonl(self, file):
+        """Append one snapshot as a JSON line to an open text file."""
+        file.write(json.dumps(self.snapshot()) + "\n")
+        file.flush()
+
+    def prometheus(self, prefix="gesturesync"):
+        snapshot = self.snapshot()
+        lines = [f"# TYPE {prefix}_fps gauge", f"{prefix}_fps {snapshot['fps']}",
+                 f"# TYPE {prefix}_frames_total counter", f"{prefix}_frames_total {snapshot['frames']}",
+                 f"# TYPE {prefix}_stage_seconds summary"]
+        for stage, values in snapshot["stages"].items():
+            for quantile in ("50", "95", "99"):
+                seconds = values[f"p{quantile}_ms"] / 1000
+                lines.append(f'{prefix}_stage_seconds{{stage="{stage}",quantile="0.{quantile}"}} {seconds}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {values["total_s"]}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {values["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=9108, host="127.0.0.1"):
+        """Serve prometheus() on http://host:port/metrics from a daemon thread."""
+        # the endpoint is opt-in, so the HTTP server is only loaded here
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True).start()
+        return self.server
@@ -0,0 +1,225 @@
+import threading
+import time
+
+from FrameModule import LeasedFrames
+
+
+class LatestFrameSlot:
+    """
+    Single-slot buffer between two pipeline stages.
+    A new item replaces the one waiting in the slot, so a slow consumer always
+    gets the most recent frame instead of a backlog of stale ones.
+    on_drop(item) is called with every item replaced before it was taken.
+    """
+
+    def __init__(self, on_drop=None):
+        self.condition = threading.Condition()
+        self.item = None
+        self.has_item = False
+        self.closed = False
+        self.dropped = 0
+        self.on_drop = on_drop
+
+    def put(self, item):
+        with self.condition:
+            dropped = self.item if self.has_item else None
+            if self.has_item:
+                self.dropped += 1
+            self.item = item
+            self.has_item = True
+            self.condition.notify()
+        if dropped is not None and self.on_drop is not None:
+            self.on_drop(dropped)
+
+    def get(self, timeout=None):
+        # returns None when the slot is closed or nothing arrived before the timeout
+        with self.condition:
+            if not self.has_item and not self.closed:
+                self.condition.wait(timeout)
+            if not self.has_item:
+                return None
+            item = self.item
+            self.item = None
+            self.has_item = False
+            return item
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class StageStats:
+    """Frame counter and busy time of one pipeline stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.frames = 0
+        self.busy_time = 0.0
+        self.window_frames = 0
+        self.window_start = time.perf_counter()
+        self.fps = 0.0
+
+    def add(self, duration):
+        with self.lock:
+            self.frames += 1
+            self.window_frames += 1
+            self.busy_time += duration
+
+    def report(self):
+        with self.lock:
+            now = time.perf_counter()
+            elapsed = now - self.window_start
+            if elapsed > 0:
+                self.fps = self.window_frames / elapsed
+            self.window_frames = 0
+            self.window_start = now
+            mean_ms = 1000 * self.busy_time / self.frames if self.frames else 0.0
+            return {"stage": self.name, "fps": round(self.fps, 1), "frames": self.frames,
+                    "mean_ms": round(mean_ms, 2)}
+
+
+class Pipeline:
+    """
+    Runs capture, inference and render/actuation on their own threads.
+
+    capture   -- cap.read() into the input slot
+    inference -- detector.detect() on the latest captured frame
+    render    -- handle(image, results) draws overlays and fires the gestures
+
+    The stages are joined by LatestFrameSlot buffers, so end-to-end latency
+    follows the slowest stage instead of the sum of all of them. Rendered
+    frames are left in `output` for the caller, because cv2.imshow and Tk
+    have to stay on the main thread; headless runs pass keep_output=False
+    and no frame outlives its render stage. Frames are decoded into buffers
+    leased from a pool and given back when a slot drops them, after render
+    when nothing keeps them, and by the caller once it has displayed one:
+
+        image = pipeline.get_frame()
+        if image is not None:
+            cv2.imshow("Image", image)
+            pipeline.release(image)
+
+    so a buffer is never decoded into while a later stage still reads it.
+    """
+
+    def __init__(self, cap, detector, handle, report_interval=5.0, keep_output=True):
+        self.cap = cap
+        self.detector = detector
+        self.handle = handle
+        self.report_interval = report_interval
+        self.keep_output = keep_output
+
+        self.frames = LeasedFrames()
+        self.captured = LatestFrameSlot(self.release)
+        self.detected = LatestFrameSlot(lambda packet: self.release(packet[0]))
+        self.output = LatestFrameSlot(self.release)
+        self.frame_shape = None
+
+        self.stats = {name: StageStats(name) for name in ("capture", "inference", "render")}
+        self.running = False
+        self.error = None
+        self.threads = []
+        self.last_report = time.perf_counter()
+
+    def start(self):
+        self.running = True
+        self.threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="inference", daemon=True),
+            threading.Thread(target=self._render_loop, name="render", daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        for slot in (self.captured, self.detected, self.output):
+            slot.close()
+        for thread in self.threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=2)
+
+    def _capture_loop(self):
+        while self.running:
+            start = time.perf_counter()
+            buffer = self.frames.acquire(self.frame_shape) if self.frame_shape else None
+            success, image = self.cap.read(buffer)
+            if image is not buffer:
+                # the reader allocated its own frame (first frame, size change or failure)
+                self.release(buffer)
+            if not success:
+                print("Error reading frame from webcam")
+                break
+            # from the second frame on, decode straight into the pool
+            self.frame_shape = image.shape
+            duration = time.perf_counter() - start
+            self.stats["capture"].add(duration)
+            self.detector.metrics.record("capture", duration)
+            self.captured.put(image)
+        self.running = False
+        self.captured.close()
+
+    def _inference_loop(self):
+        while self.running:
+            image = self.captured.get(timeout=0.1)
+            if image is None:
+                continue
+            start = time.perf_counter()
+            try:
+                results = self.detector.detect(image)
+            except Exception as e:
+                self.error = e
+                self.running = False
+                break
+            self.stats["inference"].add(time.perf_counter() - start)
+            self.detected.put((image, results))
+        self.detected.close()
+
+    def _render_loop(self):
+        while self.running:
+            packet = self.detected.get(timeout=0.1)
+            if packet is None:
+                continue
+            start = time.perf_counter()
+            try:
+                image = self.handle(*packet)
+            except Exception as e:
+                self.error = e
+                self.running = False
+                break
+            self.stats["render"].add(time.perf_counter() - start)
+            if image is not packet[0]:
+                self.release(packet[0])
+            if self.keep_output:
+                self.output.put(image)
+            else:
+                self.release(image)
+        self.output.close()
+
+    def get_frame(self, timeout=0.1):
+        """Latest rendered frame, or None if nothing new arrived in time; release() it once displayed."""
+        if self.error is not None:
+            raise self.error
+        return self.output.get(timeout=timeout)
+
+    def release(self, image):
+        """Give a captured frame back for decoding; frames not from the pool are ignored."""
+        self.frames.release(image)
+
+    def report(self):
+        """Per-stage throughput since the previous report."""
+        self.last_report = time.perf_counter()
+        stages = [stats.report() for stats in self.stats.values()]
+        stages[0]["dropped"] = self.captured.dropped
+        stages[1]["dropped"] = self.detected.dropped
+        stages[2]["dropped"] = self.output.dropped
+        return stages
+
+    def maybe_report(self):
+        # print the stage throughput every report_interval seconds
+        if self.report_interval and time.perf_counter() - self.last_report >= self.report_interval:
+            for stage in self.report():
+                print(stage)
@@ -0,0 +1,196 @@
+import json
+import os
+import time
+
+import numpy as np
+
+MAGIC = b"GSSESS01"
+ALIGN = 64
+# magic, row count, header length
+PREFIX = len(MAGIC) + 8 + 4
+HANDEDNESS = {"Left": 0, "Right": 1}
+
+
+def session_columns(max_hands):
+    """Column name -> (dtype, per-row shape) of a session file."""
+    return {
+        "time": ("<f8", ()),
+        "mode": ("i1", ()),
+        "hand_count": ("u1", ()),
+        "landmarks": ("<f4", (max_hands, 21, 3)),
+        "handedness": ("i1", (max_hands,)),
+        "fingers": ("i1", (5,)),
+    }
+
+
+def _layout(capacity, max_hands):
+    # header plus the byte offset of every column, each one a contiguous block of `capacity` rows
+    columns = {}
+    header = {"capacity": capacity, "max_hands": max_hands, "columns": columns}
+    header_size = PREFIX + 4096
+    offset = header_size
+    for name, (dtype, shape) in session_columns(max_hands).items():
+        columns[name] = {"dtype": dtype, "shape": list(shape), "offset": offset}
+        size = capacity * np.dtype(dtype).itemsize * int(np.prod(shape, dtype=np.int64))
+        offset += -(-size // ALIGN) * ALIGN
+    return header, header_size, offset
+
+
+def _read_header(path):
+    with open(path, "rb") as f:
+        prefix = f.read(PREFIX)
+        if prefix[:len(MAGIC)] != MAGIC:
+            raise ValueError("not a GestureSync session file: " + path)
+        count = int(np.frombuffer(prefix, "<u8", 1, len(MAGIC))[0])
+        header_length = int(np.frombuffer(prefix, "<u4", 1, len(MAGIC) + 8)[0])
+        return count, json.loads(f.read(header_length))
+
+
+def _map_columns(path, header, count, mode):
+    columns = {}
+    for name, column in header["columns"].items():
+        rows = header["capacity"] if mode != "r" else count
+        if rows == 0:
+            columns[name] = np.zeros((0,) + tuple(column["shape"]), column["dtype"])
+            continue
+        columns[name] = np.memmap(path, dtype=column["dtype"], mode=mode, offset=column["offset"],
+                                  shape=(rows,) + tuple(column["shape"]))
+    return columns
+
+
+class SessionRecorder:
+    """
+    Appends every frame's landmarks, handedness, finger states, mode and time
+    to a columnar, memory-mapped session file.
+
+    The file is preallocated for `capacity` rows and each column is a
+    contiguous block, so appending is a few slice assignments into the maps
+    with no per-frame Python objects. When the file fills up it is rewritten
+    with twice the capacity. Read it back with SessionReader.
+
+    Several processes can fill one preallocated file at once: each opens it
+    with SessionRecorder.open and writes its own rows with write(), and the
+    creator sets the final row count.
+    """
+
+    def __init__(self, path, capacity=108000, max_hands=2):
+        self.path = path
+        self.max_hands = max_hands
+        self.count = 0
+        self._create(path, capacity)
+
+    def _create(self, path, capacity):
+        header, header_size, file_size = _layout(capacity, self.max_hands)
+        text = json.dumps(header).encode()
+        if PREFIX + len(text) > header_size:
+            raise ValueError("session header too large")
+        with open(path, "wb") as f:
+            f.write(MAGIC + np.uint64(self.count).tobytes() + np.uint32(len(text)).tobytes() + text)
+            f.truncate(file_size)
+        self.capacity = capacity
+        self.header = header
+        self.row_count = np.memmap(path, dtype="<u8", mode="r+", offset=len(MAGIC), shape=(1,))
+        self.columns = _map_columns(path, header, capacity, "r+")
+
+    @classmethod
+    def open(cls, path):
+        """Map an existing session file for writing rows by index, without changing its row count."""
+        self = cls.__new__(cls)
+        self.count, self.header = _read_header(path)
+        self.path = path
+        self.max_hands = self.header["max_hands"]
+        self.capacity = self.header["capacity"]
+        self.row_count = np.memmap(path, dtype="<u8", mode="r+", offset=len(MAGIC), shape=(1,))
+        self.columns = _map_columns(path, self.header, self.capacity, "r+")
+        return self
+
+    def _grow(self):
+        old_columns, old_path = self.columns, self.path
+        grown_path = self.path + ".grow"
+        self._create(grown_path, self.capacity * 2)
+        for name in old_columns:
+            self.columns[name][:self.count] = old_columns[name][:self.count]
+        self.flush()
+        # every map of both files has to be closed before the replace, Windows refuses
+        # to replace a file that is still mapped
+        old_columns.clear()
+        del old_columns
+        self.columns = self.row_count = None
+        os.replace(grown_path, old_path)
+        self.row_count = np.memmap(old_path, dtype="<u8", mode="r+", offset=len(MAGIC), shape=(1,))
+        self.columns = _map_columns(old_path, self.header, self.capacity, "r+")
+
+    def append(self, mode, landmarks, hand_count, handedness, fingers, timestamp=None):
+        """
+        :param landmarks: (hands, 21, 3) array, only the first hand_count rows are used
+        :param handedness: sequence of "Left"/"Right" labels, or codes
+        :param fingers: finger states of the tracked hand, None when there is no hand
+        """
+        if self.count == self.capacity:
+            self._grow()
+        self.write(self.count, mode, landmarks, hand_count, handedness, fingers, timestamp)
+        self.count += 1
+        self.row_count[0] = self.count
+
+    def write(self, i, mode, landmarks, hand_count, handedness, fingers, timestamp=None):
+        """Fill row i, which must be below capacity; the row count is left alone."""
+        columns = self.columns
+        hand_count = min(hand_count, self.max_hands)
+
+        columns["time"][i] = time.time() if timestamp is None else timestamp
+        columns["mode"][i] = mode
+        columns["hand_count"][i] = hand_count
+        columns["landmarks"][i, :hand_count] = landmarks[:hand_count]
+        columns["landmarks"][i, hand_count:] = np.nan
+        columns["handedness"][i] = -1
+        for h in range(min(hand_count, len(handedness))):
+            label = handedness[h]
+            columns["handedness"][i, h] = HANDEDNESS.get(label, -1) if isinstance(label, str) else label
+        columns["fingers"][i] = -1 if fingers is None else fingers
+
+    def set_count(self, count):
+        # rows [0, count) were filled with write()
+        self.count = count
+        self.row_count[0] = count
+
+    def record(self, detector):
+        """Append the state HandDetection holds after handle_gestures."""
+        frame = detector.landmarks
+        fingers = detector.fingers if detector.list_of_lm else None
+        self.append(detector.mode, frame.data, frame.count, detector.handedness_labels(), fingers)
+
+    def flush(self):
+        for column in self.columns.values():
+            column.flush()
+        self.row_count.flush()
+
+    def close(self):
+        if self.columns is not None:
+            self.flush()
+            self.columns = self.row_count = None
+
+
+class SessionReader:
+    """
+    Memory-maps a session file read-only. Every column is a numpy view of
+    the file, so slicing hours of frames copies nothing:
+
+        session = SessionReader("station.gsr")
+        misfires = session["time"][session["mode"] == 3]
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count, self.header = _read_header(path)
+        self.max_hands = self.header["max_hands"]
+        self.columns = _map_columns(path, self.header, self.count, "r")
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def landmark_stream(self):
+        """(frames, hands, 21, 3) landmarks with NaN for missing hands, as replayed by benchmark.py."""
+        return self.columns["landmarks"]
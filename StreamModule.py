@@ -0,0 +1,303 @@
+"""
+Local landmark stream: one detector publishes every frame's landmarks,
+finger codes and gestures over UDP, and any number of local programs
+subscribe with LandmarkSubscriber instead of opening the camera themselves.
+
+Subscribers send a SUB datagram to the publisher and repeat it as a
+heartbeat; a subscriber not heard from for `client_timeout` seconds is
+dropped. Frames are packed little-endian with struct into datagrams of up to
+`max_datagram` bytes:
+
+    datagram  "GSLM", version u8, frame count u8, sequence u32
+    frame     number u32, time f8, mode i1, hand count u1, gesture count u1
+    hand      handedness i1 (0 left, 1 right, -1 unknown), finger code u1, 21 x 3 landmarks f4
+    gesture   name length u1, UTF-8 name
+
+The socket is non-blocking. A datagram a subscriber cannot take right now is
+dropped and counted, never queued, so a slow consumer never stalls detection.
+Subscribers see drops as gaps in the sequence numbers.
+"""
+import socket
+import struct
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from GestureModule import NO_HAND
+from LandmarkModule import FINGER_BITS, FINGER_PIPS, FINGER_TIPS, NUM_LANDMARKS, THUMB_IP, THUMB_TIP
+from SessionModule import HANDEDNESS
+
+MAGIC = b"GSLM"
+VERSION = 1
+SUBSCRIBE, UNSUBSCRIBE = b"SUB", b"BYE"
+DEFAULT_PORT = 9109
+
+DATAGRAM = struct.Struct("<4sBBI")
+FRAME = struct.Struct("<IdbBB")
+HAND = struct.Struct("<bB")
+LANDMARK_BYTES = NUM_LANDMARKS * 3 * 4
+
+StreamHand = namedtuple("StreamHand", "handedness code landmarks")
+StreamFrame = namedtuple("StreamFrame", "number time mode hands gestures")
+
+
+def finger_codes(landmarks):
+    """Finger codes of (hands, 21, 3) normalized landmarks, by the same comparisons as LandmarkFrame.fingers."""
+    fingers = np.empty((len(landmarks), 5), np.int32)
+    fingers[:, 0] = landmarks[:, THUMB_TIP, 0] > landmarks[:, THUMB_IP, 0]
+    fingers[:, 1:] = landmarks[:, FINGER_TIPS, 1] < landmarks[:, FINGER_PIPS, 1]
+    return fingers @ FINGER_BITS
+
+
+class LandmarkPublisher:
+    """
+    Sends frames to every subscriber on the local machine.
+
+        publisher = LandmarkPublisher()
+        publisher.publish_detector(detector)   # once per handled frame
+
+    Frames are batched until `batch_frames` are waiting, the next frame would
+    not fit in a datagram, or the oldest waiting frame is `batch_interval`
+    seconds old. The default of one frame per datagram gives the lowest
+    latency.
+    """
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, batch_frames=1, batch_interval=0.05,
+                 max_datagram=16384, client_timeout=5.0):
+        self.address = (host, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(self.address)
+        self.sock.setblocking(False)
+        self.batch_frames = batch_frames
+        self.batch_interval = batch_interval
+        self.client_timeout = client_timeout
+        self.clients = {}
+
+        self.buffer = bytearray(max_datagram)
+        self.bytes = np.frombuffer(self.buffer, np.uint8)
+        self.offset = DATAGRAM.size
+        self.frames = 0
+        self.batch_start = 0.0
+        self.sequence = 0
+        self.frame_number = 0
+        self.sent = 0
+        self.dropped = 0
+
+    def poll_clients(self, now=None):
+        # subscriptions and heartbeats arrive on the publishing socket itself, no extra thread
+        now = time.monotonic() if now is None else now
+        while True:
+            try:
+                message, address = self.sock.recvfrom(64)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                # e.g. ICMP port unreachable from a subscriber that went away, on Windows
+                continue
+            if message.startswith(SUBSCRIBE):
+                self.clients[address] = now
+            elif message.startswith(UNSUBSCRIBE):
+                self.clients.pop(address, None)
+        for address, seen in list(self.clients.items()):
+            if now - seen > self.client_timeout:
+                del self.clients[address]
+
+    def publish(self, mode, landmarks, hand_count, handedness=(), codes=(), gestures=(), timestamp=None):
+        """
+        :param landmarks: (hands, 21, 3) normalized landmarks, the first hand_count are sent
+        :param handedness: "Left"/"Right" labels or codes per hand
+        :param codes: finger code per hand
+        :param gestures: names of the gestures that acted in this frame
+        """
+        gestures = [name.encode()[:255] for name in gestures]
+        size = FRAME.size + hand_count * (HAND.size + LANDMARK_BYTES) + sum(1 + len(name) for name in gestures)
+        if size > len(self.buffer) - DATAGRAM.size:
+            raise ValueError("frame of {} bytes does not fit in a datagram".format(size))
+        if self.offset + size > len(self.buffer):
+            self.flush()
+
+        now = time.monotonic()
+        if not self.frames:
+            self.batch_start = now
+        self.frame_number = (self.frame_number + 1) & 0xFFFFFFFF
+        offset = self.offset
+        FRAME.pack_into(self.buffer, offset, self.frame_number, time.time() if timestamp is None else timestamp,
+                        mode, hand_count, len(gestures))
+        offset += FRAME.size
+        for h in range(hand_count):
+            label = handedness[h] if h < len(handedness) else -1
+            HAND.pack_into(self.buffer, offset, HANDEDNESS.get(label, -1) if isinstance(label, str) else label,
+                           int(codes[h]) if h < len(codes) else NO_HAND)
+            offset += HAND.size
+            points = np.ascontiguousarray(landmarks[h], "<f4")
+            self.bytes[offset:offset + LANDMARK_BYTES] = points.view(np.uint8).ravel()
+            offset += LANDMARK_BYTES
+        for name in gestures:
+            self.buffer[offset] = len(name)
+            self.buffer[offset + 1:offset + 1 + len(name)] = name
+            offset += 1 + len(name)
+        self.offset = offset
+        self.frames += 1
+
+        # the frame count of a datagram is one byte
+        if self.frames >= min(self.batch_frames, 255) or now - self.batch_start >= self.batch_interval:
+            self.flush()
+
+    def publish_detector(self, detector):
+        """Publish the state HandDetection holds after handle_gestures."""
+        frame = detector.landmarks
+        self.publish(detector.mode, frame.data, frame.count, detector.handedness_labels(), frame.codes(),
+                     detector.fired)
+
+    def flush(self):
+        if not self.frames:
+            return
+        self.poll_clients()
+        self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+        DATAGRAM.pack_into(self.buffer, 0, MAGIC, VERSION, self.frames, self.sequence)
+        datagram = memoryview(self.buffer)[:self.offset]
+        for address in list(self.clients):
+            try:
+                self.sock.sendto(datagram, address)
+                self.sent += 1
+            except (BlockingIOError, InterruptedError):
+                # socket buffer full: this datagram is lost for this subscriber, the next one is fresh
+                self.dropped += 1
+            except OSError:
+                self.clients.pop(address, None)
+        self.offset = DATAGRAM.size
+        self.frames = 0
+
+    def close(self):
+        self.flush()
+        self.sock.close()
+
+
+def decode(datagram):
+    """(sequence, [StreamFrame, ...]) of one datagram."""
+    magic, version, count, sequence = DATAGRAM.unpack_from(datagram, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a landmark stream datagram")
+    offset = DATAGRAM.size
+    frames = []
+    for _ in range(count):
+        number, timestamp, mode, hand_count, gesture_count = FRAME.unpack_from(datagram, offset)
+        offset += FRAME.size
+        hands = []
+        for _ in range(hand_count):
+            handedness, code = HAND.unpack_from(datagram, offset)
+            offset += HAND.size
+            landmarks = np.frombuffer(datagram, "<f4", NUM_LANDMARKS * 3, offset).reshape(NUM_LANDMARKS, 3)
+            offset += LANDMARK_BYTES
+            hands.append(StreamHand(handedness, code, landmarks))
+        gestures = []
+        for _ in range(gesture_count):
+            length = datagram[offset]
+            gestures.append(bytes(datagram[offset + 1:offset + 1 + length]).decode())
+            offset += 1 + length
+        frames.append(StreamFrame(number, timestamp, mode, hands, gestures))
+    return sequence, frames
+
+
+class LandmarkSubscriber:
+    """
+    Client side of the stream:
+
+        with LandmarkSubscriber() as stream:
+            for frame in stream:
+                print(frame.number, [hand.code for hand in frame.hands], frame.gestures)
+
+    Iterating yields StreamFrame tuples and keeps the subscription alive. It
+    ends when nothing arrives for `timeout` seconds (None waits forever).
+    Lost datagrams are counted in `lost`.
+    """
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, heartbeat=1.0, timeout=None, receive_buffer=1 << 20):
+        self.address = (host, port)
+        self.heartbeat = heartbeat
+        self.timeout = timeout
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+        self.sock.bind((host, 0))
+        self.buffer = bytearray(65536)
+        self.last_heartbeat = 0.0
+        self.last_data = time.monotonic()
+        self.sequence = None
+        self.received = 0
+        self.lost = 0
+        self.subscribe()
+
+    def subscribe(self):
+        self.sock.sendto(SUBSCRIBE, self.address)
+        self.last_heartbeat = time.monotonic()
+
+    def receive(self):
+        """Frames of the next datagram; [] when the heartbeat came due first, None after `timeout` s of silence."""
+        now = time.monotonic()
+        if now - self.last_heartbeat >= self.heartbeat:
+            self.subscribe()
+        if self.timeout is not None and now - self.last_data >= self.timeout:
+            return None
+        wait = self.last_heartbeat + self.heartbeat - now
+        if self.timeout is not None:
+            wait = min(wait, self.last_data + self.timeout - now)
+        self.sock.settimeout(max(wait, 0.001))
+        try:
+            size = self.sock.recv_into(self.buffer)
+        except socket.timeout:
+            return []
+        except ConnectionResetError:
+            # Windows reports a publisher that is not running yet this way
+            return []
+        self.last_data = time.monotonic()
+        # copy, so the landmark arrays handed out are not overwritten by the next datagram
+        sequence, frames = decode(bytes(self.buffer[:size]))
+        if self.sequence is not None:
+            self.lost += (sequence - self.sequence - 1) & 0xFFFFFFFF
+        self.sequence = sequence
+        self.received += 1
+        return frames
+
+    def __iter__(self):
+        while True:
+            frames = self.receive()
+            if frames is None:
+                return
+            yield from frames
+
+    def close(self):
+        try:
+            self.sock.sendto(UNSUBSCRIBE, self.address)
+        except OSError:
+            pass
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def replay(path, publisher, speed=1.0, loop=False):
+    """Publish a recorded session file at its recorded pace (speed 0 as fast as possible)."""
+    from SessionModule import SessionReader
+
+    session = SessionReader(path)
+    times, modes, counts = session["time"], session["mode"], session["hand_count"]
+    landmarks, handedness = session["landmarks"], session["handedness"]
+    while True:
+        start = time.perf_counter()
+        for i in range(len(session)):
+            if speed and i:
+                delay = (times[i] - times[0]) / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            n = int(counts[i])
+            publisher.publish(int(modes[i]), landmarks[i], n, handedness[i, :n].tolist(),
+                              finger_codes(landmarks[i, :n]).tolist(), (), float(times[i]))
+        publisher.flush()
+        if not loop:
+            break
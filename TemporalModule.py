@@ -0,0 +1,183 @@
+import math
+import time
+
+import numpy as np
+
+from GestureModule import pattern_codes
+from LandmarkModule import NUM_LANDMARKS
+
+WRIST, THUMB_TIP, INDEX_TIP, PALM = 0, 4, 8, 9
+
+
+class TemporalGestures:
+    """
+    Gestures that need more than one frame, from the last `size` frames of
+    the tracked hand kept in a preallocated ring.
+
+    Every feature is updated from the newest frame and the one leaving the
+    window, so a frame costs the same however long the history is:
+
+    velocity   -- EMA of the palm velocity
+    trajectory -- palm displacement and path length over the last `window` frames
+    pinch      -- thumb to index tip distance
+    stillness  -- how long the palm has been at rest
+
+    Distances are in hand sizes (wrist to middle knuckle), so the thresholds
+    hold at any distance from the camera. update() returns the events of the
+    frame:
+
+    swipe_left/right/up/down -- a fast, straight palm movement (image directions)
+    flick_left/right/up/down -- the fingertip snapping relative to a steady palm
+    hold                     -- the palm at rest for hold_time seconds
+    pinch_start, pinch_end   -- thumb and index tips meeting and parting again
+    drag                     -- every frame while pinched
+
+    Swipes and flicks fire once and re-arm when the movement stops. Events
+    are bound to handlers like GestureDispatcher bindings, per mode and
+    finger pattern:
+
+        temporal.bind(MOUSE_MODE, "flick_up", "x111x", "flick scroll up", handler)
+    """
+
+    def __init__(self, size=32, window=6, smoothing=0.3, swipe_distance=1.5, straightness=0.8,
+                 flick_speed=8.0, rest_speed=1.0, hold_time=0.6, pinch_on=0.3, pinch_off=0.45):
+        self.size = size
+        self.window = min(window, size - 1)
+        self.smoothing = smoothing
+        self.swipe_distance = swipe_distance
+        self.straightness = straightness
+        self.flick_speed = flick_speed
+        self.rest_speed = rest_speed
+        self.hold_time = hold_time
+        self.pinch_on = pinch_on
+        self.pinch_off = pinch_off
+
+        self.points = np.zeros((size, NUM_LANDMARKS, 3), np.float32)
+        self.times = np.zeros(size, np.float64)
+        self.palms = np.zeros((size, 2), np.float64)
+        self.steps = np.zeros(size, np.float64)
+        self.bindings = {}
+        self.reset()
+
+    def reset(self):
+        self.index = -1
+        self.count = 0
+        self.scale = 0.0
+        self.velocity = np.zeros(2)
+        self.tip = np.zeros(2)
+        self.tip_delta = np.zeros(2)
+        self.tip_speed = 0.0
+        self.path_length = 0.0
+        self.displacement = np.zeros(2)
+        self.pinch = math.inf
+        self.pinched = False
+        self.still_since = None
+        self.held = False
+        self.swipe_armed = True
+        self.flick_armed = True
+
+    def update(self, landmarks, t=None):
+        """Add one frame of (21, 3) landmarks, or None when the hand is gone; returns its events."""
+        if landmarks is None:
+            events = ["pinch_end"] if self.pinched else []
+            self.reset()
+            return events
+        t = time.perf_counter() if t is None else t
+        previous = self.index
+        i = self.index = (self.index + 1) % self.size
+        self.points[i] = landmarks
+        self.times[i] = t
+        palm = self.palms[i]
+        palm[:] = landmarks[PALM, :2]
+        scale = math.hypot(*(landmarks[PALM, :2] - landmarks[WRIST, :2]))
+        self.scale = scale if not self.count else self.scale + 0.3 * (scale - self.scale)
+        scale = max(self.scale, 1e-6)
+        tip = landmarks[INDEX_TIP, :2] - landmarks[PALM, :2]
+        self.count = min(self.count + 1, self.size)
+        events = []
+
+        if self.count > 1:
+            dt = max(t - self.times[previous], 1e-6)
+            delta = palm - self.palms[previous]
+            step = self.steps[i] = math.hypot(*delta)
+            self.velocity += self.smoothing * (delta / dt - self.velocity)
+            self.tip_delta = tip - self.tip
+            self.tip_speed = math.hypot(*self.tip_delta) / dt / scale
+            # running sums over the window: add the newest step, drop the one leaving
+            self.path_length += step
+            if self.count > self.window + 1:
+                self.path_length -= self.steps[(i - self.window) % self.size]
+            oldest = (i - min(self.window, self.count - 1)) % self.size
+            self.displacement = palm - self.palms[oldest]
+        else:
+            self.steps[i] = 0.0
+        self.tip = tip
+        speed = math.hypot(*self.velocity) / scale
+
+        # swipe: far and straight over the window
+        distance = math.hypot(*self.displacement) / scale
+        if self.swipe_armed and distance > self.swipe_distance \
+                and distance * scale > self.straightness * self.path_length:
+            events.append("swipe_" + self.direction(self.displacement))
+            self.swipe_armed = False
+        elif not self.swipe_armed and speed < self.rest_speed:
+            self.swipe_armed = True
+
+        # flick: the fingertip moves much faster than the palm
+        if self.flick_armed and self.tip_speed > self.flick_speed and speed < self.flick_speed / 3:
+            events.append("flick_" + self.direction(self.tip_delta))
+            self.flick_armed = False
+        elif not self.flick_armed and self.tip_speed < self.flick_speed / 3:
+            self.flick_armed = True
+
+        # hold: at rest long enough, once per rest
+        if speed < self.rest_speed:
+            if self.still_since is None:
+                self.still_since = t
+            elif not self.held and t - self.still_since >= self.hold_time:
+                events.append("hold")
+                self.held = True
+        else:
+            self.still_since = None
+            self.held = False
+
+        # pinch with hysteresis, so a pinch held near the threshold does not flicker
+        self.pinch = math.hypot(*(landmarks[THUMB_TIP, :2] - landmarks[INDEX_TIP, :2])) / scale
+        if not self.pinched and self.pinch < self.pinch_on:
+            self.pinched = True
+            events.append("pinch_start")
+        elif self.pinched and self.pinch > self.pinch_off:
+            self.pinched = False
+            events.append("pinch_end")
+        if self.pinched:
+            events.append("drag")
+        return events
+
+    @staticmethod
+    def direction(delta):
+        dx, dy = delta
+        if abs(dx) >= abs(dy):
+            return "right" if dx > 0 else "left"
+        return "down" if dy > 0 else "up"
+
+    def bind(self, mode, event, pattern, name, handler):
+        """Run handler(detector, image, draw) on event in mode (None for every mode) while the fingers match."""
+        codes = frozenset(pattern_codes(pattern))
+        self.bindings.setdefault((mode, event), []).append((name, handler, codes))
+
+    def unbind(self, name):
+        for key, entries in self.bindings.items():
+            self.bindings[key] = [entry for entry in entries if entry[0] != name]
+
+    def dispatch(self, detector, image, draw=True):
+        """Update from the detector's tracked hand and run the handlers bound to the events."""
+        landmarks = detector.landmarks.data[detector.hand_no] if detector.list_of_lm else None
+        for event in self.update(landmarks):
+            for key in ((detector.mode, event), (None, event)):
+                for name, handler, codes in self.bindings.get(key, ()):
+                    if detector.finger_code in codes:
+                        with detector.metrics.time(name):
+                            result = handler(detector, image, draw)
+                        if result is not None:
+                            image = result
+        return image
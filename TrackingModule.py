@@ -0,0 +1,178 @@
+import copy
+
+import numpy as np
+
+
+class HandResults:
+    """Stand-in for MediaPipe's results object, for frames that did not run the model."""
+
+    def __init__(self, multi_hand_landmarks=None, multi_handedness=None):
+        self.multi_hand_landmarks = multi_hand_landmarks
+        self.multi_handedness = multi_handedness
+
+    @classmethod
+    def from_points(cls, hands):
+        """Results holding one landmark list per (21, 3) array of normalized points, for synthetic or replayed hands."""
+        # the landmark proto is only needed here, so mediapipe's internals are not imported otherwise
+        from mediapipe.framework.formats import landmark_pb2
+
+        multi_hand_landmarks = []
+        for points in hands:
+            hand_landmarks = landmark_pb2.NormalizedLandmarkList()
+            for x, y, z in points.tolist():
+                hand_landmarks.landmark.add(x=x, y=y, z=z)
+            multi_hand_landmarks.append(hand_landmarks)
+        return cls(multi_hand_landmarks or None)
+
+
+class LandmarkPredictor:
+    """
+    Constant-velocity motion model for every landmark of every hand.
+
+    observe() is fed the model's results, predict() extrapolates them to a
+    later time for the frames that skip inference. The velocity is smoothed
+    with an exponential moving average so a single noisy detection does not
+    throw the prediction off.
+    """
+
+    def __init__(self, smoothing=0.6, max_horizon=0.25):
+        """
+        :param smoothing: weight of the newest velocity measurement
+        :param max_horizon: never extrapolate further than this many seconds
+        """
+        self.smoothing = smoothing
+        self.max_horizon = max_horizon
+        self.position = None
+        self.velocity = None
+        self.time = None
+        self.results = None
+
+    def can_predict(self):
+        return self.position is not None
+
+    def observe(self, results, t):
+        """
+        Update the model with detected landmarks.
+        :return: mean distance between the prediction for t and the detection,
+                 in normalized image units, or None if there was nothing to compare
+        """
+        hands = results.multi_hand_landmarks
+        if not hands:
+            self.position = self.velocity = self.results = None
+            return None
+
+        position = np.array([[(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark]
+                             for hand_landmarks in hands], np.float32)
+        error = None
+        if self.position is not None and self.position.shape == position.shape:
+            dt = t - self.time
+            predicted = self.position + self.velocity * min(dt, self.max_horizon)
+            error = float(np.linalg.norm(predicted[..., :2] - position[..., :2], axis=-1).mean())
+            if dt > 0:
+                velocity = (position - self.position) / dt
+                self.velocity += self.smoothing * (velocity - self.velocity)
+        else:
+            self.velocity = np.zeros_like(position)
+
+        self.position = position
+        self.time = t
+        self.results = results
+        return error
+
+    def predict(self, t):
+        """Results shaped like the last detection, with the landmarks moved to time t."""
+        predicted = self.position + self.velocity * min(t - self.time, self.max_horizon)
+        hands = []
+        for hand_landmarks, points in zip(self.results.multi_hand_landmarks, predicted.tolist()):
+            hand_landmarks = copy.deepcopy(hand_landmarks)
+            for lm, (x, y, z) in zip(hand_landmarks.landmark, points):
+                lm.x, lm.y, lm.z = x, y, z
+            hands.append(hand_landmarks)
+        return HandResults(hands, self.results.multi_handedness)
+
+
+class HandTracker:
+    """
+    Stable identities for the hands of consecutive frames.
+
+    MediaPipe lists the hands of a frame in no particular order, so index 0
+    can be a different hand from one frame to the next. update() matches
+    every hand to the nearest track centroid of the previous frames, cheapest
+    pairs first, and hands further than `max_distance` from any track start a
+    new one. A track survives `max_missing` frames without its hand, so a
+    short dropout keeps the identity.
+
+    MediaPipe's handedness labels are averaged per track, as single frames
+    flip now and then, and a label that disagrees with a track's makes the
+    match more expensive.
+    """
+
+    def __init__(self, max_distance=0.25, max_missing=5, smoothing=0.3, handedness_weight=0.1):
+        self.max_distance = max_distance
+        self.max_missing = max_missing
+        self.smoothing = smoothing
+        self.handedness_weight = handedness_weight
+        # track id -> centroid, share of "Right" labels (0.5 unknown), frames missing
+        self.centroids = {}
+        self.right = {}
+        self.missing = {}
+        self.next_id = 0
+        self.ids = np.empty(0, np.int64)
+
+    def update(self, points, labels=()):
+        """
+        :param points: (hands, 21, 3) normalized landmarks of this frame
+        :param labels: MediaPipe handedness label per hand, "Left" or "Right"
+        :return: track id per hand
+        """
+        n = len(points)
+        # one pass over all hands at once
+        centroids = points[:, :, :2].mean(axis=1) if n else np.empty((0, 2))
+        right = np.array([0.5 if i >= len(labels) else float(labels[i] == "Right") for i in range(n)])
+        tracks = list(self.centroids)
+        ids = np.full(n, -1, np.int64)
+
+        if n and tracks:
+            previous = np.array([self.centroids[t] for t in tracks])
+            cost = np.linalg.norm(centroids[:, None] - previous[None], axis=2)
+            cost += self.handedness_weight * np.abs(right[:, None] - np.array([self.right[t] for t in tracks])[None])
+            taken = set()
+            # greedy, cheapest first: with the two or three hands of a frame this is the best assignment
+            for flat in np.argsort(cost, axis=None).tolist():
+                i, j = divmod(flat, len(tracks))
+                if cost[i, j] > self.max_distance:
+                    break
+                if ids[i] < 0 and j not in taken:
+                    ids[i] = tracks[j]
+                    taken.add(j)
+
+        for i in range(n):
+            track = int(ids[i])
+            if track < 0:
+                track = ids[i] = self.next_id
+                self.next_id += 1
+                self.right[track] = 0.5
+            self.centroids[track] = centroids[i]
+            self.missing[track] = 0
+            if i < len(labels):
+                self.right[track] += self.smoothing * (right[i] - self.right[track])
+
+        seen = set(ids.tolist())
+        for track in tracks:
+            if track not in seen:
+                self.missing[track] += 1
+                if self.missing[track] > self.max_missing:
+                    del self.centroids[track], self.right[track], self.missing[track]
+        self.ids = ids
+        return ids
+
+    def handedness(self, i):
+        """Averaged handedness label of hand i of the last update, None while unknown."""
+        right = self.right[int(self.ids[i])]
+        if right == 0.5:
+            return None
+        return "Right" if right > 0.5 else "Left"
+
+    def primary(self):
+        """Index of the hand tracked longest in the last update, None without hands."""
+        return int(np.argmin(self.ids)) if len(self.ids) else None
@@ -3,78 +3,104 @@ from tkinter import ttk
 from PIL import Image, ImageTk
 import cv2
 from HandDetectionModule import HandDetection
+from PipelineModule import Pipeline
 
 
 class HandControlApp:
-    def __init__(self, root, cap, webcam_width, webcam_height):
+    def __init__(self, root, cap, webcam_width, webcam_height, frame_interval=10):
         self.root = root
         self.cap = cap
-        self.detector = HandDetection()
+        # the one detector (and MediaPipe graph) of the app
+        self.detector = HandDetection(roi_tracking=True)
+        self.pipeline = None
+        self.frame_interval = frame_interval  # ms between polls for a new frame
 
         # Create GUI elements
-        self.canvas = tk.Canvas(root, width=1200, height=720)
+        self.canvas = tk.Canvas(root, width=webcam_width, height=webcam_height)
         self.canvas.pack()
         self.start_button = ttk.Button(root, text="Start", command=self.start_detection)
         self.start_button.pack()
+        # why detection stopped, when it did not stop by itself
+        self.status = ttk.Label(root, text="")
+        self.status.pack()
+
+        # one PIL image, one PhotoImage and one canvas item, updated in place every frame
+        self.frame_image = None
+        self.photo = None
+        self.canvas_image = None
 
         self.webcam_width, self.webcam_height = webcam_width, webcam_height
 
-    def start_detection(self):
-        detector = HandDetection()  # Initialize HandDetection object
-
-        while True:
-            success, image = self.cap.read()
-
-            if not success:
-                print("Error reading frame from webcam")
-                break
-
-            # Pass image to the `find_hands` method for processing
-            image = detector.find_hands(image)
-
-            # Show FPS on the image
-            image = detector.show_fps(image)
-
-            # Find hand landmarks and bounding box
-            list_of_lm, bbox, image = detector.find_position(image, 0, True)
-
-            # Detect finger positions
-            if len(list_of_lm):
-                detector.fingers_up()
-
-            image = detector.mode_select(image, self.webcam_width)
-            if detector.mode == 0:
-                image = detector.volume_controller(image)
-            elif detector.mode == 1:
-                image = detector.brightness_controller(image)
-            elif detector.mode == 2:
-                # cv2.circle(image, (webcam_width // 2, webcam_height // 2), 10, (255, 0, 0))
-                image = detector.cursor_move(image)
-                detector.click()
-                detector.scroll()
-                # detector.click_and_drag()
-            elif detector.mode == 3:
-                image = detector.hand_keyboard(image)
+        self.root.bind("<Escape>", lambda event: self.close())  # Press 'Esc' to exit
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
+    def start_detection(self):
+        if self.pipeline is not None:
+            return
+        self.start_button.state(["disabled"])
+        # capture, inference and gesture handling run on background threads,
+        # the Tk event loop only picks up finished frames
+        self.pipeline = Pipeline(self.cap, self.detector, self.process_frame).start()
+        self.root.after(self.frame_interval, self.update_frame)
+
+    def process_frame(self, image, results):
+        # runs on the pipeline's render thread
+        image = self.detector.use_results(image, results)
+
+        # Show FPS on the image
+        image = self.detector.show_fps(image)
+
+        # Landmarks, mode button and the active mode's controllers
+        return self.detector.handle_gestures(image, self.webcam_width)
+
+    def update_frame(self):
+        if self.pipeline is None:
+            return
+
+        try:
+            img = self.pipeline.get_frame(timeout=0)
+        except Exception as e:
+            # detect() or the gestures failed on a pipeline thread; an exception escaping this
+            # callback would end the refresh loop and leave capture and inference running
+            self.stop_detection()
+            self.status.configure(text=f"Detection stopped: {e}")
+            return
+        if img is not None:
             # Update the canvas with the processed image
-            self.display_image(image)
-
-            # Update the GUI
-            self.root.update()
-
-            if cv2.waitKey(1) & 0xFF == 27:  # Press 'Esc' to exit
-                break
-
-        self.cap.release()
-        cv2.destroyAllWindows()
-
-    def display_image(self, image):
-        # Convert image from BGR to RGB for tkinter
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        img = Image.fromarray(image)
-        imgtk = ImageTk.PhotoImage(image=img)
-        self.canvas.imgtk = imgtk
-        self.canvas.create_image(0, 0, anchor=tk.NW, image=imgtk)
+            self.display_image(img)
+            self.pipeline.release(img)
+        elif not self.pipeline.running:
+            self.stop_detection()
+            return
+
+        self.pipeline.maybe_report()
+        self.root.after(self.frame_interval, self.update_frame)
+
+    def display_image(self, img):
+        # the BGR frame is unpacked into one persistent PIL image (PIL swaps the channels
+        # while copying, so there is no separate RGB array) and pasted into the one PhotoImage
+        size = (img.shape[1], img.shape[0])
+        if self.frame_image is None or self.frame_image.size != size:
+            self.frame_image = Image.new("RGB", size)
+            self.frame_image.frombytes(img.data, "raw", "BGR")
+            self.photo = ImageTk.PhotoImage(image=self.frame_image)
+            if self.canvas_image is None:
+                self.canvas_image = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
+            else:
+                self.canvas.itemconfigure(self.canvas_image, image=self.photo)
+        else:
+            self.frame_image.frombytes(img.data, "raw", "BGR")
+            self.photo.paste(self.frame_image)
+
+    def stop_detection(self):
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            self.pipeline = None
+        self.detector.close()
+
+    def close(self):
+        self.stop_detection()
+        self.root.destroy()
 
 
 def main():
@@ -97,7 +123,6 @@ def main():
     root.mainloop()
 
     cap.release()
-    cv2.destroyAllWindows()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,202 @@
+"""
+Offline labelling: runs hand detection over a long video or a directory of
+videos and images on a process pool and writes every frame's landmarks,
+handedness and finger states to one session file (see SessionModule).
+
+    python batch.py shift.mp4 --output shift.gsr
+    python batch.py archive/ --output archive.gsr --workers 8 --static
+
+Videos are split into chunks of --chunk frames. Each worker seeks to its
+chunk and decodes it frame by frame, so no video is ever held in memory,
+and writes its rows straight into the preallocated output file. Row
+ranges per source are listed in <output>.json. The time column holds the
+position in the source in seconds; frames a video announced but did not
+decode are left with mode -1 and no hand.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from SessionModule import SessionRecorder, SessionReader
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm", ".m4v", ".mpg", ".mpeg")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff")
+NO_LANDMARKS = np.empty((0, 21, 3), np.float32)
+
+# per-process state, set up once by init_worker
+worker = {}
+
+
+def list_sources(path):
+    if os.path.isfile(path):
+        return [path]
+    sources = []
+    for directory, subdirectories, files in os.walk(path):
+        subdirectories.sort()
+        sources.extend(os.path.join(directory, name) for name in sorted(files)
+                       if name.lower().endswith(VIDEO_EXTENSIONS + IMAGE_EXTENSIONS))
+    return sources
+
+
+def plan(sources, chunk):
+    """Row range of every source and the jobs that fill them."""
+    index, jobs, images = [], [], []
+    row = 0
+
+    def flush_images():
+        # consecutive images are batched into jobs of `chunk` files
+        for i in range(0, len(images), chunk):
+            jobs.append(("images", images[i:i + chunk], images[i][1]))
+        images.clear()
+
+    for source in sources:
+        if source.lower().endswith(IMAGE_EXTENSIONS):
+            index.append({"path": source, "kind": "image", "first_row": row, "rows": 1})
+            images.append((source, row))
+            row += 1
+            continue
+        flush_images()
+        cap = cv2.VideoCapture(source)
+        if not cap.isOpened():
+            print("skipping unreadable video:", source, file=sys.stderr)
+            continue
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        cap.release()
+        index.append({"path": source, "kind": "video", "first_row": row, "rows": frames, "fps": fps})
+        for first in range(0, frames, chunk):
+            jobs.append(("video", (source, first, min(chunk, frames - first), fps), row + first))
+        row += frames
+    flush_images()
+    return index, jobs, row
+
+
+def init_worker(output, max_hands, static, warmup):
+    from ActuatorModule import Actuator, RecordingBackend
+    from HandDetectionModule import HandDetection
+
+    # the pool already uses every core
+    cv2.setNumThreads(1)
+
+    def detector(static_image_mode):
+        return HandDetection(mode=static_image_mode, max_hands=max_hands, actuator=Actuator(RecordingBackend()))
+
+    worker["recorder"] = SessionRecorder.open(output)
+    worker["new_detector"] = detector
+    worker["static"] = static
+    worker["warmup"] = warmup
+    worker["detectors"] = {}
+
+
+def get_detector(static_image_mode):
+    detectors = worker["detectors"]
+    if static_image_mode not in detectors:
+        detectors[static_image_mode] = worker["new_detector"](static_image_mode)
+    return detectors[static_image_mode]
+
+
+def label(detector, image, row, timestamp):
+    recorder = worker["recorder"]
+    if image is None:
+        recorder.write(row, -1, NO_LANDMARKS, 0, (), None, np.nan)
+        return False
+    detector.find_hands(image, draw=False)
+    list_of_lm, _, _ = detector.find_position(image, draw=False)
+    if list_of_lm:
+        detector.fingers_up()
+    frame = detector.landmarks
+    recorder.write(row, 0, frame.data, frame.count, detector.handedness_labels(),
+                   detector.fingers if list_of_lm else None, timestamp)
+    return bool(list_of_lm)
+
+
+def run_job(job):
+    kind, work, row = job
+    start = time.perf_counter()
+    frames = hands = 0
+    if kind == "images":
+        detector = get_detector(True)
+        for path, image_row in work:
+            hands += label(detector, cv2.imread(path), image_row, 0.0)
+            frames += 1
+    else:
+        path, first, count, fps = work
+        static = worker["static"]
+        detector = get_detector(static)
+        if not static:
+            # tracking state from the previous chunk belongs to another part of the video
+            detector.hands.reset()
+        cap = cv2.VideoCapture(path)
+        # in tracking mode a few frames before the chunk let the tracker lock on first
+        skip = 0 if static else min(first, worker["warmup"])
+        cap.set(cv2.CAP_PROP_POS_FRAMES, first - skip)
+        image = None
+        for i in range(-skip, count):
+            success, image = cap.read(image)
+            if not success:
+                # fewer frames than the container announced
+                for missing in range(max(i, 0), count):
+                    label(detector, None, row + missing, None)
+                break
+            if i < 0:
+                detector.find_hands(image, draw=False)
+                continue
+            hands += label(detector, image, row + i, (first + i) / fps)
+            frames += 1
+        cap.release()
+    worker["recorder"].flush()
+    return frames, hands, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Label the hands in a video or a directory of footage.")
+    parser.add_argument("source", help="video file, or directory of videos and images")
+    parser.add_argument("--output", required=True, help="session file to write (.gsr)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk", type=int, default=1500, help="frames (or images) per job")
+    parser.add_argument("--max-hands", type=int, default=2)
+    parser.add_argument("--static", action="store_true",
+                        help="detect every video frame independently instead of tracking")
+    parser.add_argument("--warmup", type=int, default=5,
+                        help="frames decoded before each chunk in tracking mode")
+    args = parser.parse_args()
+
+    sources = list_sources(args.source)
+    if not sources:
+        raise SystemExit("no videos or images found in " + args.source)
+    index, jobs, rows = plan(sources, args.chunk)
+
+    # preallocated once, the workers fill disjoint rows of it
+    recorder = SessionRecorder(args.output, capacity=max(rows, 1), max_hands=args.max_hands)
+    with open(args.output + ".json", "w") as f:
+        json.dump({"static_image_mode": args.static, "max_hands": args.max_hands, "sources": index}, f, indent=1)
+
+    start = time.perf_counter()
+    frames = hands = done = 0
+    with mp.Pool(min(args.workers, len(jobs)) or 1, init_worker,
+                 (args.output, args.max_hands, args.static, args.warmup)) as pool:
+        for job_frames, job_hands, _ in pool.imap_unordered(run_job, jobs):
+            frames += job_frames
+            hands += job_hands
+            done += 1
+            elapsed = time.perf_counter() - start
+            print(f"{done}/{len(jobs)} jobs, {frames}/{rows} frames, {frames / elapsed:.1f} fps",
+                  file=sys.stderr, flush=True)
+    elapsed = time.perf_counter() - start
+
+    recorder.set_count(rows)
+    recorder.close()
+    print(json.dumps({"output": args.output, "sources": len(index), "frames": frames,
+                      "frames_with_hands": hands, "rows": len(SessionReader(args.output)),
+                      "workers": args.workers, "seconds": round(elapsed, 2),
+                      "fps": round(frames / elapsed, 2) if elapsed > 0 else None}))
+
+
+if __name__ == "__main__":
+    main()
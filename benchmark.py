@@ -0,0 +1,239 @@
+"""
+Headless benchmark: replays a video file or a recorded landmark stream through
+HandDetection and prints FPS, per-stage latency percentiles and peak memory
+as JSON. OS actions go to a SimulatedBackend, so no webcam, desktop or
+Windows-only package is needed; its pointer log gives the cursor's jitter
+and latency.
+
+    python benchmark.py clip.mp4
+    python benchmark.py clip.mp4 --save-landmarks clip.npy
+    python benchmark.py clip.npy --output result.json
+    python benchmark.py station.gsr
+    python benchmark.py clip.mp4 --startup
+
+A landmark stream is a .npy array of shape (frames, hands, 21, 3) holding
+MediaPipe's normalized x, y, z, with NaN for hands that were not detected,
+or a session file recorded with main.py --record.
+"""
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+import HandDetectionModule as hdm
+from ActuatorModule import Actuator, SimulatedBackend
+from SessionModule import SessionReader
+from TrackingModule import HandResults
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STAGES = ["detect", "draw_hands", "find_position", "fingers_up", "mode_select", "volume_controller",
+          "brightness_controller", "cursor_move", "click", "scroll", "hand_keyboard", "frame"]
+
+
+# OS integrations that must not be loaded just by importing the module and creating HandDetection
+OPTIONAL_MODULES = ["comtypes", "pycaw", "screen_brightness_control", "pyautogui", "keyboard"]
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import HandDetectionModule
+imported = time.perf_counter()
+HandDetectionModule.HandDetection()
+created = time.perf_counter()
+print(json.dumps({"import_s": round(imported - start, 4), "create_detector_s": round(created - imported, 4),
+                  "optional_modules_loaded": [name for name in %r if name in sys.modules]}))
+""" % OPTIONAL_MODULES
+
+
+def measure_startup():
+    # a fresh interpreter, so nothing is already imported
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], check=True, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    startup = json.loads(output.strip().splitlines()[-1])
+    startup["process_s"] = round(time.perf_counter() - start, 4)
+    return startup
+
+
+def video_frames(path, width, height):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit("Error opening video: " + path)
+    try:
+        while True:
+            success, image = cap.read()
+            if not success:
+                break
+            if (image.shape[1], image.shape[0]) != (width, height):
+                image = cv2.resize(image, (width, height))
+            yield image, None
+    finally:
+        cap.release()
+
+
+def landmark_frames(path, width, height):
+    if path.endswith(".gsr"):
+        stream = SessionReader(path).landmark_stream()
+    else:
+        stream = np.load(path, mmap_mode="r")
+    background = np.zeros((height, width, 3), np.uint8)
+    for hands in stream:
+        # rows of missing hands are NaN
+        results = HandResults.from_points([points for points in hands if not np.isnan(points).any()])
+        # a fresh copy of the background so the overlays do not pile up
+        yield background.copy(), results
+
+
+def landmarks_of(results, max_hands):
+    # inverse of landmark_frames, for --save-landmarks
+    points = np.full((max_hands, 21, 3), np.nan, np.float32)
+    for i, hand_landmarks in enumerate((results.multi_hand_landmarks or [])[:max_hands]):
+        points[i] = [(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark]
+    return points
+
+
+@contextlib.contextmanager
+def quiet():
+    # the controllers print every action, keep stdout for the report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def percentiles(samples):
+    if not samples:
+        return None
+    values = np.array(samples) * 1000
+    return {"count": len(samples), "mean_ms": round(float(values.mean()), 3),
+            "p50_ms": round(float(np.percentile(values, 50)), 3),
+            "p95_ms": round(float(np.percentile(values, 95)), 3),
+            "p99_ms": round(float(np.percentile(values, 99)), 3)}
+
+
+def cursor_stats(pointer_log, metrics):
+    # jitter: RMS distance of the pointer from the mean of its 5 surrounding positions
+    if len(pointer_log) < 5:
+        return {"moves": len(pointer_log)}
+    path = np.array(pointer_log)[:, 1:]
+    smooth = np.stack([np.convolve(path[:, axis], np.ones(5) / 5, "valid") for axis in range(2)], 1)
+    jitter = np.sqrt(((path[2:-2] - smooth) ** 2).sum(1).mean())
+    latency = metrics.snapshot()["stages"].get("cursor_latency")
+    return {"moves": len(pointer_log), "jitter_px": round(float(jitter), 2),
+            "latency_p50_ms": latency["p50_ms"] if latency else None,
+            "latency_p95_ms": latency["p95_ms"] if latency else None}
+
+
+def peak_memory_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run(args):
+    backend = SimulatedBackend()
+    detector = hdm.HandDetection(max_hands=args.max_hands, actuator=Actuator(backend),
+                                 roi_tracking=args.roi, inference_stride=args.stride)
+    if args.source.endswith((".npy", ".gsr")):
+        frames = landmark_frames(args.source, args.width, args.height)
+    else:
+        frames = video_frames(args.source, args.width, args.height)
+
+    timings = {stage: [] for stage in STAGES}
+    recorded = []
+
+    def timed(stage, function, *call_args):
+        start = time.perf_counter()
+        result = function(*call_args)
+        timings[stage].append(time.perf_counter() - start)
+        return result
+
+    count = 0
+    start = time.perf_counter()
+    with quiet():
+        for image, results in frames:
+            if args.frames and count >= args.frames:
+                break
+            frame_start = time.perf_counter()
+            if results is None:
+                results = timed("detect", detector.detect, image)
+            if args.save_landmarks:
+                recorded.append(landmarks_of(results, args.max_hands))
+
+            detector.debounce.tick()
+            image = timed("draw_hands", detector.use_results, image, results, args.draw)
+            list_of_lm, bbox, image = timed("find_position", detector.find_position, image, 0, args.draw)
+            if len(list_of_lm):
+                timed("fingers_up", detector.fingers_up)
+            image = timed("mode_select", detector.mode_select, image, args.width, args.draw)
+
+            # every mode's controllers run on every frame, whatever mode is selected
+            image = timed("volume_controller", detector.volume_controller, image, args.draw)
+            image = timed("brightness_controller", detector.brightness_controller, image, args.draw)
+            image = timed("cursor_move", detector.cursor_move, image)
+            timed("click", detector.click)
+            timed("scroll", detector.scroll)
+            image = timed("hand_keyboard", detector.hand_keyboard, image, args.draw)
+
+            timings["frame"].append(time.perf_counter() - frame_start)
+            count += 1
+    elapsed = time.perf_counter() - start
+    detector.cursor.stop()
+    detector.actuator.stop()
+
+    if args.save_landmarks:
+        np.save(args.save_landmarks, np.array(recorded, np.float32).reshape(-1, args.max_hands, 21, 3))
+
+    actions = {}
+    for action, _ in backend.calls:
+        actions[action] = actions.get(action, 0) + 1
+
+    return {
+        "source": args.source,
+        "frames": count,
+        "seconds": round(elapsed, 3),
+        "fps": round(count / elapsed, 2) if elapsed > 0 else None,
+        "stages": {stage: percentiles(samples) for stage, samples in timings.items() if samples},
+        "peak_memory_mb": peak_memory_mb(),
+        "actions": actions,
+        "cursor": cursor_stats(backend.pointer_log, detector.metrics),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a video or landmark stream through HandDetection.")
+    parser.add_argument("source", help="video file, .npy landmark stream or .gsr session file")
+    parser.add_argument("--frames", type=int, default=0, help="stop after this many frames (0 = all)")
+    parser.add_argument("--width", type=int, default=1200)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--max-hands", type=int, default=1)
+    parser.add_argument("--no-draw", dest="draw", action="store_false", help="skip the overlays")
+    parser.add_argument("--roi", action="store_true", help="enable region-of-interest tracking")
+    parser.add_argument("--stride", type=int, default=1, help="inference stride for predictive tracking")
+    parser.add_argument("--save-landmarks", help="write the replayed landmarks to this .npy file")
+    parser.add_argument("--output", help="write the JSON report to this file as well")
+    parser.add_argument("--startup", action="store_true",
+                        help="also time importing the module and creating HandDetection in a new process")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.startup:
+        report["startup"] = measure_startup()
+    text = json.dumps(report)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
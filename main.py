@@ -1,8 +1,39 @@
+import argparse
+import time
+
 import HandDetectionModule as hdm
+import PipelineModule as pm
 import cv2
+from ActuatorModule import Actuator
+from StreamModule import DEFAULT_PORT
 
 
 def main():
+    parser = argparse.ArgumentParser(description="GestureSync hand gesture control.")
+    parser.add_argument("--headless", action="store_true",
+                        help="no window and no overlays, only gesture detection and actions")
+    parser.add_argument("--backend", choices=["system", "null", "recording", "simulated"],
+                        help="where gesture actions go (default: $GESTURESYNC_BACKEND or system)")
+    parser.add_argument("--frame-budget", type=float,
+                        help="milliseconds of inference per frame; model complexity, resolution and max hands "
+                             "are stepped down or up to stay within it")
+    parser.add_argument("--temporal-gestures", action="store_true",
+                        help="also recognize swipes (mode), pinch (click and drag), flicks (scroll) and hold")
+    parser.add_argument("--two-hands", action="store_true",
+                        help="track both hands: fingers held up on the left hand pick the mode, the right hand "
+                             "drives it")
+    parser.add_argument("--idle-after", type=float, default=5.0,
+                        help="seconds without a hand before the model only runs on motion or once a second "
+                             "(0 keeps it running on every frame)")
+    parser.add_argument("--record", help="record landmarks, finger states and mode to this session file")
+    parser.add_argument("--publish", type=int, nargs="?", const=DEFAULT_PORT, metavar="PORT",
+                        help="stream landmarks and gestures to local subscribers over UDP (default port %d)"
+                             % DEFAULT_PORT)
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this port")
+    parser.add_argument("--metrics-file", help="append a JSON line of metrics to this file every few seconds")
+    parser.add_argument("--metrics-interval", type=float, default=5.0, help="seconds between JSON lines")
+    args = parser.parse_args()
+
     # Set webcam width and height for desired resolution
     webcam_width, webcam_height = 1200, 720
 
@@ -14,45 +45,73 @@ def main():
         print("Error opening webcam:", e)
         exit()
 
-    detector = hdm.HandDetection()
-
-    while True:
-        success, image = cap.read()
-
-        if not success:
-            print("Error reading frame from webcam")
-            break
-
-        # Pass image to the `find_hands` method for processing
-        image = detector.find_hands(image)
-        image = detector.show_fps(image)
-        # print hand landmark to terminal
-        list_of_lm, bbox, image = detector.find_position(image, 0, True)
-        if len(list_of_lm):
-            detector.fingers_up()
-
-        image = detector.mode_select(image, webcam_width)
-        if detector.mode == 0:
-            image = detector.volume_controller(image)
-        elif detector.mode == 1:
-            image = detector.brightness_controller(image)
-        elif detector.mode == 2:
-            # cv2.circle(image, (webcam_width // 2, webcam_height // 2), 10, (255, 0, 0))
-            image = detector.cursor_move(image)
-            detector.click()
-            detector.scroll()
-            # detector.click_and_drag()
-        elif detector.mode == 3:
-            image = detector.hand_keyboard(image)
-
-        # Display the image
-        cv2.imshow("Image", image)
-
-        if cv2.waitKey(1) & 0xFF == 27:  # Press 'Esc' to exit
-            break
+    # only a crop around the tracked hand is sent to the model once a hand is found
+    detector = hdm.HandDetection(roi_tracking=True, actuator=Actuator(args.backend),
+                                 frame_budget=args.frame_budget / 1000 if args.frame_budget else None,
+                                 temporal_gestures=args.temporal_gestures,
+                                 max_hands=2 if args.two_hands else 1,
+                                 hand_roles=hdm.TWO_HAND_ROLES if args.two_hands else None,
+                                 idle_after=args.idle_after)
+    metrics = detector.metrics
+    if args.record:
+        detector.start_recording(args.record)
+    if args.publish:
+        detector.start_publishing(args.publish)
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+    metrics_file = open(args.metrics_file, "a") if args.metrics_file else None
+    last_export = time.monotonic()
+
+    draw = not args.headless
+
+    def handle(image, results):
+        # render/actuation stage: runs on its own thread after inference
+        image = detector.use_results(image, results, draw)
+        image = detector.show_fps(image, draw)
+        return detector.handle_gestures(image, webcam_width, draw)
+
+    # capture, inference and render/actuation run as separate pipeline stages
+    pipeline = pm.Pipeline(cap, detector, handle, keep_output=draw).start()
+
+    try:
+        while True:
+            if args.headless:
+                # nothing to display, wake up now and then for the reports until Ctrl+C
+                if not pipeline.running:
+                    if pipeline.error is not None:
+                        raise pipeline.error
+                    break
+                time.sleep(0.2)
+            else:
+                image = pipeline.get_frame()
+                if image is not None:
+                    # Display the image
+                    with metrics.time("display"):
+                        cv2.imshow("Image", image)
+                    pipeline.release(image)
+                elif not pipeline.running:
+                    break
+
+            pipeline.maybe_report()
+            if metrics_file and time.monotonic() - last_export >= args.metrics_interval:
+                metrics.write_jsonl(metrics_file)
+                last_export = time.monotonic()
+
+            if not args.headless and cv2.waitKey(1) & 0xFF == 27:  # Press 'Esc' to exit
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pipeline.stop()
+        detector.stop_recording()
+        detector.stop_publishing()
+        detector.close()
+        if metrics_file:
+            metrics_file.close()
 
     cap.release()
-    cv2.destroyAllWindows()
+    if not args.headless:
+        cv2.destroyAllWindows()
 
 
 if __name__ == "__main__":
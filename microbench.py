@@ -0,0 +1,242 @@
+"""
+Micro-benchmarks of the per-frame hot paths of HandDetection: landmark
+extraction, finger states, distances, the mode button, the keyboard and its
+drawing, the FPS overlay, the volume and brightness controllers and the whole
+handle_gestures frame in every mode.
+
+Each case runs against synthetic MediaPipe-shaped landmark results on a
+generated frame (1280x720 by default), with OS actions going to the null
+backend, so no camera, desktop or model inference is involved. Results can
+be saved as a baseline and later runs compared against it; the exit status
+is 1 when a case got slower than its threshold allows.
+
+    python microbench.py
+    python microbench.py --save microbench.json
+    python microbench.py --compare microbench.json
+    python microbench.py --cases "frame*" --compare microbench.json
+
+A case regresses when its median exceeds the baseline median by more than
+max(relative x baseline, absolute_ms). The thresholds are stored in the
+baseline file, top-level and optionally per case, and --relative and
+--absolute-ms override them.
+"""
+import argparse
+import fnmatch
+import gc
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+import HandDetectionModule as hdm
+from ActuatorModule import Actuator
+from benchmark import quiet
+from TrackingModule import HandResults
+
+DEFAULT_RELATIVE = 0.25
+DEFAULT_ABSOLUTE_MS = 0.1
+
+# finger patterns of the synthetic poses, thumb to pinky
+POSES = {"cursor": "01100", "volume": "11001"}
+
+
+def synthetic_hand(pattern, cx=0.5, cy=0.55, size=0.3):
+    """(21, 3) normalized landmarks of an upright hand, thumb on the right, with the fingers of pattern up."""
+    points = np.zeros((21, 3), np.float32)
+    points[0] = (cx, cy + size / 2, 0)
+    # knuckles across the palm from index to pinky, fingers pointing up
+    for finger, dx in enumerate((0.2, 0.05, -0.1, -0.25)):
+        mcp = 5 + 4 * finger
+        x = cx + dx * size
+        up = pattern[finger + 1] == "1"
+        points[mcp] = (x, cy - 0.1 * size, -0.02)
+        points[mcp + 1] = (x, cy - 0.3 * size, -0.03)
+        points[mcp + 2] = (x, cy - (0.45 if up else 0.25) * size, -0.04)
+        points[mcp + 3] = (x, cy - (0.6 if up else 0.15) * size, -0.05)
+    # thumb spread out to the right when up, its tip folded back over the palm when down
+    spread = (0.3, 0.4, 0.5, 0.6) if pattern[0] == "1" else (0.3, 0.35, 0.3, 0.15)
+    for joint, dx, dy in zip(range(1, 5), spread, (0.35, 0.2, 0.05, -0.1)):
+        points[joint] = (cx + dx * size, cy + dy * size, -0.02 * joint)
+    return points
+
+
+def synthetic_results(pattern, **hand):
+    return HandResults.from_points([synthetic_hand(pattern, **hand)])
+
+
+def synthetic_frame(width, height, seed=0):
+    # camera-like noise rather than a flat colour, so drawing and copies touch realistic data
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, (height, width, 3), np.uint8)
+
+
+class Fixture:
+    """A detector with synthetic results in a given mode and pose, ready for the per-frame calls."""
+
+    def __init__(self, detector, frame, draw):
+        self.detector = detector
+        self.frame = frame
+        self.draw = draw
+
+    def pose(self, pattern, mode=hdm.MOUSE_MODE):
+        detector = self.detector
+        detector.mode = mode
+        detector.use_results(self.frame, synthetic_results(POSES[pattern]), False)
+        detector.find_position(self.frame, 0, False)
+        detector.fingers_up()
+        return self
+
+
+def cases(fixture):
+    """name -> (setup, call) per benchmark case."""
+    d, image, draw = fixture.detector, fixture.frame, fixture.draw
+    width = image.shape[1]
+    layout = d.keyboard_layout(image.shape[1], image.shape[0])
+    buttons = d.assign()
+    return {
+        "find_position": (lambda: fixture.pose("cursor"), lambda: d.find_position(image, 0, draw)),
+        "fingers_up": (lambda: fixture.pose("cursor"), d.fingers_up),
+        "find_distance": (lambda: fixture.pose("volume"), lambda: d.find_distance(image, 4, 8, draw)),
+        "mode_select": (lambda: fixture.pose("cursor"), lambda: d.mode_select(image, width, draw)),
+        "show_fps": (lambda: None, lambda: d.show_fps(image, draw)),
+        "cornerRect": (lambda: None, lambda: d.cornerRect(image, (50, 50, 85, 85), 20, rt=0)),
+        "assign": (lambda: None, d.assign),
+        "drawAll": (lambda: None, lambda: d.drawAll(image, buttons)),
+        "keyboard_layout.draw": (lambda: None, lambda: layout.draw(image)),
+        "hand_keyboard": (lambda: fixture.pose("cursor", hdm.KEYBOARD_MODE), lambda: d.hand_keyboard(image, draw)),
+        "volume_controller": (lambda: fixture.pose("volume", hdm.VOLUME_MODE),
+                              lambda: d.volume_controller(image, draw)),
+        "brightness_controller": (lambda: fixture.pose("volume", hdm.BRIGHTNESS_MODE),
+                                  lambda: d.brightness_controller(image, draw)),
+        "frame[volume]": (lambda: fixture.pose("volume", hdm.VOLUME_MODE),
+                          lambda: d.handle_gestures(image, width, draw)),
+        "frame[brightness]": (lambda: fixture.pose("volume", hdm.BRIGHTNESS_MODE),
+                              lambda: d.handle_gestures(image, width, draw)),
+        "frame[mouse]": (lambda: fixture.pose("cursor", hdm.MOUSE_MODE),
+                         lambda: d.handle_gestures(image, width, draw)),
+        "frame[keyboard]": (lambda: fixture.pose("cursor", hdm.KEYBOARD_MODE),
+                            lambda: d.handle_gestures(image, width, draw)),
+    }
+
+
+def measure(call, repeat, min_time):
+    """Per-call seconds of `repeat` samples, each looping call long enough to take min_time."""
+    # the first call builds lazy caches such as the keyboard overlay
+    call()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        if time.perf_counter() - start >= min_time:
+            break
+        number *= 2
+    samples = np.empty(repeat)
+    # no collections in the middle of a sample, as timeit does
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for i in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                call()
+            samples[i] = (time.perf_counter() - start) / number
+    finally:
+        if enabled:
+            gc.enable()
+    values = samples * 1000
+    return {"median_ms": round(float(np.median(values)), 4), "p95_ms": round(float(np.percentile(values, 95)), 4),
+            "min_ms": round(float(values.min()), 4), "calls": number * repeat}
+
+
+def machine():
+    return {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.machine(),
+            "cpus": os.cpu_count()}
+
+
+def run(args):
+    detector = hdm.HandDetection(actuator=Actuator("null"))
+    fixture = Fixture(detector, synthetic_frame(args.width, args.height), args.draw)
+    results = {}
+    with quiet():
+        for name, (setup, call) in cases(fixture).items():
+            if args.cases and not any(fnmatch.fnmatchcase(name, pattern) for pattern in args.cases):
+                continue
+            setup()
+            results[name] = measure(call, args.repeat, args.min_time)
+    detector.cursor.stop()
+    detector.actuator.stop()
+    return results
+
+
+def compare(results, baseline, relative=None, absolute_ms=None):
+    """Per-case comparison with the baseline and the names of the cases that regressed."""
+    thresholds = baseline.get("thresholds", {})
+    report, regressions = {}, []
+    for name, result in results.items():
+        base = baseline["cases"].get(name)
+        if base is None:
+            report[name] = {"median_ms": result["median_ms"], "baseline_ms": None}
+            continue
+        case_relative = relative if relative is not None else base.get(
+            "relative", thresholds.get("relative", DEFAULT_RELATIVE))
+        case_absolute = absolute_ms if absolute_ms is not None else base.get(
+            "absolute_ms", thresholds.get("absolute_ms", DEFAULT_ABSOLUTE_MS))
+        limit = max(case_relative * base["median_ms"], case_absolute)
+        delta = result["median_ms"] - base["median_ms"]
+        report[name] = {"median_ms": result["median_ms"], "baseline_ms": base["median_ms"],
+                        "delta_ms": round(delta, 4), "limit_ms": round(limit, 4), "regression": delta > limit}
+        if delta > limit:
+            regressions.append(name)
+    return report, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark the per-frame paths of HandDetection.")
+    parser.add_argument("--cases", nargs="*", help="only the cases matching these patterns, e.g. 'frame*'")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--no-draw", dest="draw", action="store_false", help="skip the overlays")
+    parser.add_argument("--repeat", type=int, default=30, help="samples per case")
+    parser.add_argument("--min-time", type=float, default=0.01, help="seconds per sample")
+    parser.add_argument("--save", metavar="BASELINE", help="write the results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare with a baseline, exit 1 on a regression")
+    parser.add_argument("--relative", type=float, help="allowed slowdown as a fraction of the baseline "
+                                                       "(default: from the baseline, else %g)" % DEFAULT_RELATIVE)
+    parser.add_argument("--absolute-ms", type=float, help="allowed slowdown in milliseconds, the larger of the "
+                                                          "two applies (default: from the baseline, else %g)"
+                                                          % DEFAULT_ABSOLUTE_MS)
+    args = parser.parse_args()
+
+    results = run(args)
+    report = {"frame_size": [args.width, args.height], "draw": args.draw, "machine": machine(), "cases": results}
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if (baseline.get("frame_size"), baseline.get("draw")) != (report["frame_size"], report["draw"]):
+            parser.error("the baseline was recorded with frame size {} and draw={}".format(
+                baseline.get("frame_size"), baseline.get("draw")))
+        if baseline.get("machine") != report["machine"]:
+            print("warning: the baseline was recorded on a different machine or Python", file=sys.stderr)
+        report["cases"], regressions = compare(results, baseline, args.relative, args.absolute_ms)
+        report["regressions"] = regressions
+        status = 1 if regressions else 0
+    if args.save:
+        baseline = dict(report, cases=results,
+                        thresholds={"relative": DEFAULT_RELATIVE if args.relative is None else args.relative,
+                                    "absolute_ms": DEFAULT_ABSOLUTE_MS if args.absolute_ms is None
+                                    else args.absolute_ms})
+        baseline.pop("regressions", None)
+        with open(args.save, "w") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+    print(json.dumps(report))
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+Multi-stream runner: one detector worker process per camera or video file.
+
+Frames go from the capture thread to the worker, and landmarks come back,
+through shared-memory rings instead of pickled arrays. Each worker is
+pinned to its own core where the OS allows it. Throughput per stream and in
+aggregate is printed as JSON lines. Video files are read at their own frame
+rate like a camera, --unpaced decodes them as fast as possible instead.
+
+    python multistream.py 0 1
+    python multistream.py a.mp4 b.mp4 c.mp4 --seconds 30
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import threading
+import time
+from collections import deque
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+
+def result_dtype(max_hands):
+    return np.dtype([("frame", "<i8"), ("captured", "<f8"), ("detected", "<f8"), ("hand_count", "<i4"),
+                     ("landmarks", "<f4", (max_hands, 21, 3)), ("fingers", "i1", (max_hands, 5))])
+
+
+class SharedRing:
+    """
+    Latest-wins ring of equally sized slots in shared memory, one writer and one reader.
+
+    Every slot carries a sequence number used as a seqlock: it is -1 while
+    the writer fills the slot and the frame number once it is complete. A
+    reader that sees the number change while it used the slot drops what it
+    read instead of blocking the writer.
+    """
+
+    def __init__(self, shape, dtype, slots=4, name=None):
+        dtype = np.dtype(dtype)
+        self.shape, self.dtype, self.slots = tuple(shape), dtype, slots
+        header_size = 8 * (1 + 2 * slots)
+        slot_size = dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=header_size + slots * slot_size)
+            self.owner = True
+        else:
+            # workers share the runner's resource tracker, only the owner unlinks
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.name = self.shm.name
+        # [latest frame, slot sequence numbers...], then a capture time per slot
+        self.sequence = np.ndarray((1 + slots,), np.int64, self.shm.buf)
+        self.times = np.ndarray((slots,), np.float64, self.shm.buf, 8 * (1 + slots))
+        self.data = np.ndarray((slots,) + self.shape, dtype, self.shm.buf, header_size)
+        if self.owner:
+            self.sequence[:] = 0
+
+    def spec(self):
+        # what another process needs to attach
+        return self.shape, self.dtype.descr if self.dtype.fields else self.dtype.str, self.slots, self.name
+
+    def begin_write(self):
+        frame = int(self.sequence[0]) + 1
+        slot = frame % self.slots
+        self.sequence[1 + slot] = -1
+        return frame, self.data[slot]
+
+    def commit(self, frame, timestamp):
+        slot = frame % self.slots
+        self.times[slot] = timestamp
+        self.sequence[1 + slot] = frame
+        self.sequence[0] = frame
+
+    def abort(self, frame):
+        # give up a begin_write, the slot goes back to the frame it held before
+        self.sequence[1 + frame % self.slots] = max(frame - self.slots, 0)
+
+    def write(self, value, timestamp):
+        frame, view = self.begin_write()
+        view[...] = value
+        self.commit(frame, timestamp)
+        return frame
+
+    def latest(self, after=0):
+        """(frame, capture time, slot view) of the newest complete slot after `after`, or None."""
+        frame = int(self.sequence[0])
+        if frame <= after:
+            return None
+        slot = frame % self.slots
+        timestamp = float(self.times[slot])
+        if int(self.sequence[1 + slot]) != frame:
+            return None
+        return frame, timestamp, self.data[slot]
+
+    def still_valid(self, frame):
+        # the slot was not overwritten while it was being read
+        return int(self.sequence[1 + frame % self.slots]) == frame
+
+    def close(self):
+        self.sequence = self.times = self.data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def attach_ring(spec):
+    shape, dtype, slots, name = spec
+    if isinstance(dtype, list):
+        dtype = [tuple(field) for field in dtype]
+    return SharedRing(shape, dtype, slots, name)
+
+
+def detector_worker(index, frame_spec, result_spec, max_hands, core, stop, options):
+    # imported in the worker so the parent never loads a MediaPipe graph
+    from ActuatorModule import Actuator, RecordingBackend
+    from HandDetectionModule import HandDetection
+    from LandmarkModule import LandmarkFrame
+
+    if core is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {core})
+    # one core per stream, so OpenCV should not spread over the others
+    cv2.setNumThreads(1)
+
+    frames = attach_ring(frame_spec)
+    results_ring = attach_ring(result_spec)
+    detector = HandDetection(max_hands=max_hands, actuator=Actuator(RecordingBackend()), **options)
+    landmarks = LandmarkFrame(max_hands)
+    height, width = frames.shape[:2]
+    last = 0
+    try:
+        while not stop.is_set():
+            latest = frames.latest(last)
+            if latest is None:
+                time.sleep(0.001)
+                continue
+            frame, captured, image = latest
+            # inference reads the shared slot directly, no copy
+            results = detector.detect(image)
+            if not frames.still_valid(frame):
+                # overwritten mid-inference by a capture four frames ahead
+                last = frame
+                continue
+            last = frame
+
+            landmarks.update(results, width, height)
+            n = min(landmarks.count, max_hands)
+            row_frame, row = results_ring.begin_write()
+            row["frame"] = frame
+            row["captured"] = captured
+            row["detected"] = time.time()
+            row["hand_count"] = n
+            row["landmarks"][:n] = landmarks.data[:n]
+            row["fingers"][:n] = landmarks.fingers()[:n]
+            results_ring.commit(row_frame, captured)
+    finally:
+        frames.close()
+        results_ring.close()
+
+
+class Stream:
+    """One source: capture thread in this process, detector in a worker process."""
+
+    def __init__(self, index, source, args, core, stop):
+        self.index = index
+        self.source = source
+        self.args = args
+        self.cap = cv2.VideoCapture(int(source) if source.isdigit() else source)
+        if args.width and args.height:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, args.width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, args.height)
+        success, first = self.cap.read()
+        if not success:
+            raise SystemExit("Error reading from source: " + source)
+        self.size = (args.width, args.height) if args.width and args.height else (first.shape[1], first.shape[0])
+        first = self.fit(first)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+
+        self.frames = SharedRing(first.shape, np.uint8, args.slots)
+        self.results = SharedRing((), result_dtype(args.max_hands), args.slots)
+        self.frames.write(first, time.time())
+
+        options = {"roi_tracking": args.roi, "inference_stride": args.stride}
+        self.process = mp.Process(target=detector_worker, name=f"detector-{index}",
+                                  args=(index, self.frames.spec(), self.results.spec(), args.max_hands,
+                                        core, stop, options), daemon=True)
+        self.capture_thread = threading.Thread(target=self.capture_loop, args=(stop,), daemon=True)
+        self.captured = 1
+        self.detected = 0
+        self.hands = 0
+        self.latencies = deque(maxlen=1000)
+        self.last_result = 0
+        self.last_frame = 0
+        self.done = False
+
+    def finished(self):
+        # source ended and the worker caught up with its last frame
+        return self.done and self.last_frame >= int(self.frames.sequence[0])
+
+    def fit(self, image):
+        if (image.shape[1], image.shape[0]) != self.size:
+            image = cv2.resize(image, self.size)
+        return image
+
+    def start(self):
+        self.process.start()
+        self.capture_thread.start()
+
+    def capture_loop(self, stop):
+        # cameras deliver at their own rate, files are paced to it unless asked not to
+        interval = 0 if self.source.isdigit() or self.args.unpaced else 1 / self.fps
+        next_time = time.perf_counter()
+        while not stop.is_set():
+            frame, view = self.frames.begin_write()
+            success, image = self.cap.read(view)
+            if not success and self.args.loop and not self.source.isdigit():
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                success, image = self.cap.read(view)
+            if not success:
+                self.frames.abort(frame)
+                break
+            if image is not view:
+                # decoder returned its own buffer (different size or layout)
+                view[...] = self.fit(image)
+            self.frames.commit(frame, time.time())
+            self.captured += 1
+            if interval:
+                next_time += interval
+                time.sleep(max(0.0, next_time - time.perf_counter()))
+        self.done = True
+
+    def poll(self):
+        latest = self.results.latest(self.last_result)
+        if latest is None:
+            return
+        result_frame, _, row = latest
+        frame, captured, detected, hands = int(row["frame"]), float(row["captured"]), \
+            float(row["detected"]), int(row["hand_count"])
+        if not self.results.still_valid(result_frame):
+            return
+        self.last_result = result_frame
+        self.last_frame = frame
+        self.detected += 1
+        self.hands += hands > 0
+        self.latencies.append(detected - captured)
+
+    def report(self, elapsed):
+        latencies = np.array(self.latencies) * 1000
+        return {"stream": self.index, "source": self.source, "captured": self.captured,
+                "detected": self.detected, "capture_fps": round(self.captured / elapsed, 2),
+                "detect_fps": round(self.detected / elapsed, 2), "frames_with_hands": self.hands,
+                "latency_p50_ms": round(float(np.percentile(latencies, 50)), 2) if len(latencies) else None,
+                "latency_p95_ms": round(float(np.percentile(latencies, 95)), 2) if len(latencies) else None}
+
+    def close(self):
+        self.capture_thread.join(timeout=2)
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.cap.release()
+        self.frames.close()
+        self.results.close()
+
+
+def report(streams, start):
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    per_stream = [stream.report(elapsed) for stream in streams]
+    return {"seconds": round(elapsed, 2), "streams": per_stream,
+            "aggregate": {"captured": sum(s["captured"] for s in per_stream),
+                          "detected": sum(s["detected"] for s in per_stream),
+                          "detect_fps": round(sum(s["detect_fps"] for s in per_stream), 2)}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one hand detector process per video source.")
+    parser.add_argument("sources", nargs="+", help="device indices or video files")
+    parser.add_argument("--width", type=int, default=0, help="resize frames to this width")
+    parser.add_argument("--height", type=int, default=0, help="resize frames to this height")
+    parser.add_argument("--max-hands", type=int, default=1)
+    parser.add_argument("--slots", type=int, default=4, help="slots per shared-memory ring")
+    parser.add_argument("--roi", action="store_true", help="enable region-of-interest tracking")
+    parser.add_argument("--stride", type=int, default=1, help="inference stride for predictive tracking")
+    parser.add_argument("--unpaced", action="store_true",
+                        help="decode video files as fast as possible instead of at their frame rate")
+    parser.add_argument("--loop", action="store_true", help="restart video files when they end")
+    parser.add_argument("--seconds", type=float, default=0, help="stop after this long (0 = until sources end)")
+    parser.add_argument("--report-interval", type=float, default=5.0)
+    parser.add_argument("--no-pin", dest="pin", action="store_false", help="do not pin workers to cores")
+    args = parser.parse_args()
+
+    stop = mp.Event()
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    streams = [Stream(i, source, args, cores[i % len(cores)] if args.pin else None, stop)
+               for i, source in enumerate(args.sources)]
+    start = time.perf_counter()
+    last_report = start
+    ended = None
+    try:
+        for stream in streams:
+            stream.start()
+        while True:
+            for stream in streams:
+                stream.poll()
+            now = time.perf_counter()
+            if args.seconds and now - start >= args.seconds:
+                break
+            if all(stream.done for stream in streams):
+                # give the workers a moment to finish the last frames
+                ended = ended or now
+                if all(stream.finished() for stream in streams) or now - ended > 2.0:
+                    break
+            if args.report_interval and now - last_report >= args.report_interval:
+                print(json.dumps(report(streams, start)), flush=True)
+                last_report = now
+            time.sleep(0.002)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        print(json.dumps(report(streams, start)), flush=True)
+        for stream in streams:
+            stream.close()
+
+
+if __name__ == "__main__":
+    main()
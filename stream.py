@@ -0,0 +1,77 @@
+"""
+Landmark stream tools: replay a recorded session to subscribers, or listen
+to a running publisher (main.py --publish) and print what arrives.
+
+    python stream.py replay station.gsr --loop
+    python stream.py listen
+    python stream.py listen --json --frames 100
+"""
+import argparse
+import json
+import time
+
+from StreamModule import DEFAULT_PORT, LandmarkPublisher, LandmarkSubscriber, replay
+
+
+def listen(args):
+    start = last = time.perf_counter()
+    frames = count = 0
+    with LandmarkSubscriber(port=args.port, timeout=args.timeout) as stream:
+        for frame in stream:
+            frames += 1
+            if args.json:
+                print(json.dumps({"frame": frame.number, "time": frame.time, "mode": frame.mode,
+                                  "hands": [{"handedness": hand.handedness, "code": hand.code,
+                                             "landmarks": hand.landmarks.round(4).tolist()} for hand in frame.hands],
+                                  "gestures": frame.gestures}))
+            else:
+                count += 1
+                now = time.perf_counter()
+                if now - last >= 1.0:
+                    print(json.dumps({"fps": round(count / (now - last), 1), "frames": frames,
+                                      "datagrams": stream.received, "lost": stream.lost,
+                                      "hands": len(frame.hands), "gestures": frame.gestures}))
+                    count, last = 0, now
+            if args.frames and frames >= args.frames:
+                break
+        print(json.dumps({"frames": frames, "datagrams": stream.received, "lost": stream.lost,
+                          "seconds": round(time.perf_counter() - start, 2)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish or subscribe to the local landmark stream.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    replay_parser = commands.add_parser("replay", help="publish a recorded session file")
+    replay_parser.add_argument("session", help=".gsr session file")
+    replay_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="playback speed, 0 for as fast as possible")
+    replay_parser.add_argument("--batch", type=int, default=1, help="frames per datagram")
+    replay_parser.add_argument("--loop", action="store_true")
+    listen_parser = commands.add_parser("listen", help="print frames from a running publisher")
+    listen_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    listen_parser.add_argument("--json", action="store_true", help="print every frame as a JSON line")
+    listen_parser.add_argument("--frames", type=int, default=0, help="stop after this many frames")
+    listen_parser.add_argument("--timeout", type=float, help="stop after this many seconds without data")
+    args = parser.parse_args()
+
+    if args.command == "listen":
+        listen(args)
+        return
+    publisher = LandmarkPublisher(port=args.port, batch_frames=args.batch)
+    try:
+        # give subscribers that are already running a heartbeat to find us
+        deadline = time.monotonic() + 1.5
+        while not publisher.clients and time.monotonic() < deadline:
+            publisher.poll_clients()
+            time.sleep(0.05)
+        replay(args.session, publisher, args.speed, args.loop)
+        print(json.dumps({"datagrams": publisher.sent, "dropped": publisher.dropped,
+                          "subscribers": len(publisher.clients)}))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        publisher.close()
+
+
+if __name__ == "__main__":
+    main()